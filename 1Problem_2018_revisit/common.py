@@ -0,0 +1,336 @@
+"""Please place things here which may be useful to everyone."""
+from bisect import bisect_right
+from time import time
+
+import numpy as np
+
+# A ride goes from start to end, (row, col) pairs, and scores if it finishes
+# by latest. It gets the bonus if it starts at earliest.
+# length is the distance from start to end, worked out when it is read.
+ride_dtype = np.dtype([
+    ("start", np.int32, (2,)), ("end", np.int32, (2,)),
+    ("earliest", np.int32), ("latest", np.int32),
+    ("id", np.int32), ("length", np.int32)])
+
+
+def read_rides(f, N):
+    """
+    Return the next N rides in the open file f as an array of ride_dtype.
+
+    The rides are read in one go, and each is given its line number as id.
+    """
+    values = np.array(f.read().split()[:6 * N], dtype=np.int32).reshape(N, 6)
+    rides = np.zeros(N, dtype=ride_dtype)
+    rides["start"] = values[:, 0:2]
+    rides["end"] = values[:, 2:4]
+    rides["earliest"] = values[:, 4]
+    rides["latest"] = values[:, 5]
+    rides["id"] = np.arange(N)
+    rides["length"] = np.abs(values[:, 0:2] - values[:, 2:4]).sum(axis=1)
+    return rides
+
+
+class Fleet:
+    """
+    Where every taxi will be, when it is free and what it has scored.
+
+    Kept as arrays indexed by taxi, so a ride can be checked against
+    the whole fleet at once. Rides are of ride_dtype.
+    """
+
+    def __init__(self, F, B):
+        self.bonus = B
+        self.row = np.zeros(F, dtype=np.int64)
+        self.col = np.zeros(F, dtype=np.int64)
+        self.free = np.zeros(F, dtype=np.int64)
+        self.score = np.zeros(F, dtype=np.int64)
+        self.rides = [[] for _ in range(F)]
+
+    def __repr__(self):
+        return "Fleet of {} taxis scoring {}".format(
+            len(self.free), self.score.sum())
+
+    def best_taxi(self, ride, dist_weight, bonus_weight, limit=100000000):
+        """
+        Return the taxi which can finish ride in time for the lowest weight.
+
+        The weight is the distance to the start times dist_weight,
+        plus the bonus times bonus_weight if the taxi would start on time.
+        Ties go to the lowest numbered taxi,
+        and -1 is returned if no taxi has a weight below limit.
+        """
+        a, b = ride["start"]
+        distance = np.abs(self.row - a) + np.abs(self.col - b)
+        arrive = self.free + distance
+        weight = distance * dist_weight + np.where(
+            arrive <= ride["earliest"], self.bonus * bonus_weight, 0.0)
+        weight[
+            (arrive + ride["length"] > ride["latest"]) | (weight >= limit)
+        ] = np.inf
+        best = int(np.argmin(weight))
+        return best if weight[best] < np.inf else -1
+
+    def ride_costs(self, rides, dist_weight, bonus_weight):
+        """
+        Return the cost of each taxi taking each of rides, F by len(rides).
+
+        The cost is the time the taxi spends getting to the start and
+        waiting there times dist_weight, less the length of the ride and
+        the bonus times bonus_weight if the taxi would start on time.
+        A taxi which can't finish a ride in time costs np.inf for it.
+        """
+        free = self.free[:, None]
+        distance = (np.abs(self.row[:, None] - rides["start"][:, 0]) +
+                    np.abs(self.col[:, None] - rides["start"][:, 1]))
+        start = np.maximum(free + distance, rides["earliest"])
+        cost = (start - free) * dist_weight - rides["length"] - np.where(
+            start == rides["earliest"], self.bonus * bonus_weight, 0.0)
+        cost[start + rides["length"] > rides["latest"]] = np.inf
+        return cost
+
+    def add_ride(self, taxi, ride):
+        """Give ride to taxi, which drives there and waits if early."""
+        a, b = ride["start"]
+        distance = abs(self.row[taxi] - a) + abs(self.col[taxi] - b)
+        length = ride["length"]
+        if self.free[taxi] + distance <= ride["earliest"]:
+            self.free[taxi] = ride["earliest"] + length
+            self.score[taxi] += length + self.bonus
+        else:
+            self.free[taxi] += distance + length
+            self.score[taxi] += length
+        self.row[taxi], self.col[taxi] = ride["end"]
+        self.rides[taxi].append(int(ride["id"]))
+
+
+class RideSchedule:
+    """
+    The rides each taxi takes, set up so a change can be checked in O(1).
+
+    Only rides that score are kept. For ride k of a taxi, start[k] is when
+    it starts, finish[k] is when the taxi is next free and gain[k] is what
+    it scores. latest[k] is the latest the taxi can get to its start with
+    no ride from k on scoring any less, so a change before ride k only has
+    to get there by latest[k] to leave the rest of the taxi's rides alone.
+    Rides are of ride_dtype, in the order they were read.
+    """
+
+    def __init__(self, info, solution):
+        F, N, B, T = (int(x) for x in info[2:6])
+        self.B, self.T = B, T
+        rides = info[-1]
+        self.a, self.b = rides["start"].T.tolist()
+        self.x, self.y = rides["end"].T.tolist()
+        self.earliest = rides["earliest"].tolist()
+        self.latest_finish = rides["latest"].tolist()
+        self.length = rides["length"].tolist()
+        self.rides = [[] for _ in range(F)]
+        self.start = [[] for _ in range(F)]
+        self.finish = [[] for _ in range(F)]
+        self.gain = [[] for _ in range(F)]
+        self.latest = [[] for _ in range(F)]
+        self.taxi_of = [-1] * N
+        self.score = 0
+
+        # Keep each taxi's rides in order, dropping any that don't score
+        for taxi, car_rides in enumerate(solution[:F]):
+            row, col, time = 0, 0, 0
+            for ride in car_rides:
+                ride = int(ride)
+                if self.taxi_of[ride] != -1:
+                    continue
+                start = max(time + abs(row - self.a[ride]) +
+                            abs(col - self.b[ride]), self.earliest[ride])
+                if self._scores(ride, start):
+                    self.rides[taxi].append(ride)
+                    self.taxi_of[ride] = taxi
+                    row, col = self.x[ride], self.y[ride]
+                    time = start + max(self.length[ride], 1)
+            self._rebuild(taxi)
+        self.unassigned = [r for r in range(N) if self.taxi_of[r] == -1]
+        self.unassigned_pos = [-1] * N
+        for i, ride in enumerate(self.unassigned):
+            self.unassigned_pos[ride] = i
+
+    def __repr__(self):
+        return "Schedule of {} rides scoring {}".format(
+            len(self.taxi_of) - len(self.unassigned), self.score)
+
+    def solution(self):
+        """Return the list of rides taken by each taxi."""
+        return [list(rides) for rides in self.rides]
+
+    def _scores(self, ride, start):
+        """Return whether ride scores if it starts at start."""
+        return (start + self.length[ride] <= self.latest_finish[ride] and
+                start + max(self.length[ride], 1) < self.T)
+
+    def _rebuild(self, taxi):
+        """Work out start, finish, gain and latest again for taxi."""
+        rides = self.rides[taxi]
+        start, finish, gain = [], [], []
+        row, col, time, total = 0, 0, 0, 0
+        for ride in rides:
+            time = max(time + abs(row - self.a[ride]) +
+                       abs(col - self.b[ride]), self.earliest[ride])
+            start.append(time)
+            on_time = self.B if time == self.earliest[ride] else 0
+            gain.append(self.length[ride] + on_time)
+            time += max(self.length[ride], 1)
+            finish.append(time)
+            row, col = self.x[ride], self.y[ride]
+
+        # Work back from the last ride, a bonus is kept by not being late
+        latest = [0] * len(rides)
+        next_latest, next_a, next_b = None, 0, 0
+        for k in range(len(rides) - 1, -1, -1):
+            ride = rides[k]
+            step = max(self.length[ride], 1)
+            last_start = min(
+                self.latest_finish[ride] - self.length[ride],
+                self.T - 1 - step)
+            if next_latest is not None:
+                last_start = min(
+                    last_start,
+                    next_latest - step - abs(self.x[ride] - next_a) -
+                    abs(self.y[ride] - next_b))
+            if start[k] == self.earliest[ride]:
+                last_start = self.earliest[ride]
+            latest[k] = last_start
+            next_latest, next_a, next_b = last_start, self.a[ride], self.b[ride]
+
+        self.score += sum(gain) - sum(self.gain[taxi])
+        self.start[taxi], self.finish[taxi] = start, finish
+        self.gain[taxi], self.latest[taxi] = gain, latest
+
+    def fit(self, taxi, before, after, ride):
+        """
+        Return what ride would score between rides before and after of taxi.
+
+        before is -1 to start from the beginning, and after is the number of
+        rides the taxi has to finish after it, with any rides in between
+        taken out. Returns -1 if ride wouldn't score or a ride from after
+        on would score less.
+        """
+        if before == -1:
+            row, col, time = 0, 0, 0
+        else:
+            prev = self.rides[taxi][before]
+            row, col = self.x[prev], self.y[prev]
+            time = self.finish[taxi][before]
+        start = max(time + abs(row - self.a[ride]) + abs(col - self.b[ride]),
+                    self.earliest[ride])
+        if not self._scores(ride, start):
+            return -1
+        if after < len(self.rides[taxi]):
+            next_ride = self.rides[taxi][after]
+            arrive = (start + max(self.length[ride], 1) +
+                      abs(self.x[ride] - self.a[next_ride]) +
+                      abs(self.y[ride] - self.b[next_ride]))
+            if arrive > self.latest[taxi][after]:
+                return -1
+        on_time = self.B if start == self.earliest[ride] else 0
+        return self.length[ride] + on_time
+
+    def place(self, taxi, ride):
+        """Return where ride would go in the order of taxi's rides."""
+        return bisect_right(self.start[taxi], self.earliest[ride])
+
+    def _assign(self, ride, taxi, k):
+        if self.taxi_of[ride] == -1:
+            # Take ride out of the unassigned list by swapping in the last
+            i, last = self.unassigned_pos[ride], self.unassigned[-1]
+            self.unassigned[i], self.unassigned_pos[last] = last, i
+            self.unassigned.pop()
+            self.unassigned_pos[ride] = -1
+        self.rides[taxi].insert(k, ride)
+        self.taxi_of[ride] = taxi
+
+    def _unassign(self, taxi, k):
+        ride = self.rides[taxi].pop(k)
+        self.taxi_of[ride] = -1
+        self.unassigned_pos[ride] = len(self.unassigned)
+        self.unassigned.append(ride)
+        return ride
+
+    def try_insert(self, ride, taxi):
+        """Put the unassigned ride in taxi if it scores there."""
+        k = self.place(taxi, ride)
+        if self.fit(taxi, k - 1, k, ride) <= 0:
+            return False
+        self._assign(ride, taxi, k)
+        self._rebuild(taxi)
+        return True
+
+    def try_relocate(self, taxi, k, to_taxi):
+        """Move ride k of taxi to to_taxi if that scores no less."""
+        if taxi == to_taxi:
+            return False
+        ride = self.rides[taxi][k]
+        j = self.place(to_taxi, ride)
+        if self.fit(to_taxi, j - 1, j, ride) < self.gain[taxi][k]:
+            return False
+        self._unassign(taxi, k)
+        self._assign(ride, to_taxi, j)
+        self._rebuild(taxi)
+        self._rebuild(to_taxi)
+        return True
+
+    def try_swap(self, taxi, k, ride):
+        """
+        Swap ride k of taxi with ride if that scores no less.
+
+        ride can be unassigned, in which case it just takes the place of k.
+        """
+        other_taxi = self.taxi_of[ride]
+        if other_taxi == taxi:
+            return False
+        old_ride = self.rides[taxi][k]
+        gain = self.fit(taxi, k - 1, k + 1, ride)
+        if gain < 0:
+            return False
+        change = gain - self.gain[taxi][k]
+        if other_taxi != -1:
+            j = self.rides[other_taxi].index(ride)
+            other_gain = self.fit(other_taxi, j - 1, j + 1, old_ride)
+            if other_gain < 0:
+                return False
+            change += other_gain - self.gain[other_taxi][j]
+        if change < 0:
+            return False
+
+        self._unassign(taxi, k)
+        if other_taxi != -1:
+            self._unassign(other_taxi, j)
+            self._assign(old_ride, other_taxi, j)
+            self._rebuild(other_taxi)
+        self._assign(ride, taxi, k)
+        self._rebuild(taxi)
+        return True
+
+    def improve(self, time_limit, batch_size=1000):
+        """
+        Randomly insert, move and swap rides for time_limit seconds.
+
+        Moves which would lose score are never made, but moves which score
+        the same are, to move around. Returns the number of moves made.
+        """
+        F, N = len(self.rides), len(self.taxi_of)
+        end_time = time() + time_limit
+        moves = 0
+        while time() < end_time:
+            kinds = np.random.random(batch_size)
+            picks = np.random.random((batch_size, 3))
+            for kind, (p1, p2, p3) in zip(kinds, picks):
+                taxi = int(p1 * F)
+                if kind < 1 / 3:
+                    if len(self.unassigned) > 0:
+                        ride = self.unassigned[int(p2 * len(self.unassigned))]
+                        moves += self.try_insert(ride, taxi)
+                elif len(self.rides[taxi]) > 0:
+                    k = int(p2 * len(self.rides[taxi]))
+                    if kind < 2 / 3:
+                        moves += self.try_relocate(taxi, k, int(p3 * F))
+                    else:
+                        moves += self.try_swap(taxi, k, int(p3 * N))
+        return moves
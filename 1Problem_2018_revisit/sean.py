@@ -5,108 +5,80 @@ import time
 import numpy as np
 from hyperopt import fmin, tpe, hp, STATUS_OK, Trials, space_eval
 
-
-def manhat_dist(a1, a2):
-    return np.abs(a1[0] - a2[0]) + np.abs(a1[1] - a2[1])
-
-
-class Taxi:
-    def __init__(self, R, C, B, idx):
-        self.location = np.array([0, 0])
-        self.rides = []
-        self.rows = R
-        self.cols = C
-        self.bonus = B
-        self.time = 0
-        self.score = 0
-        self.taxi_num = idx
-
-    def move_left(self):
-        self.location = np.clip(
-            self.location - np.array([1, 0]), 0, self.rows)
-
-    def move_right(self):
-        self.location = np.clip(
-            self.location + np.array([1, 0]), 0, self.rows)
-
-    def move_up(self):
-        self.location = np.clip(
-            self.location + np.array([0, 1]), 0, self.cols)
-
-    def move_down(self):
-        self.location = np.clip(
-            self.location - np.array([0, 1]), 0, self.cols)
-
-    def move_random(self):
-        rand = np.random.rand()
-        print(rand)
-        if rand < 0.25:  # move up
-            self.move_up()
-        elif rand < 0.5:  # move down
-            self.move_down()
-        elif rand < 0.75:  # move left
-            self.move_left()
-        else:  # move right
-            self.move_right()
-
-    def next(self, curr_time):
-        if self.time >= curr_time:
-            pass
-        else:
-            self.move_random()
-            self.time += 1
-
-    def can_reach(self, ride):
-        manhat_d = manhat_dist(self.location, [ride[0], ride[1]])
-        ride_len = manhat_dist([ride[0], ride[1]], [ride[2], ride[3]])
-        can_reach = (self.time + manhat_d + ride_len <= ride[5])
-        return can_reach, manhat_d
-
-    def add_ride(self, ride):
-        manhat_d = manhat_dist(self.location, [ride[0], ride[1]])
-        ride_len = manhat_dist([ride[0], ride[1]], [ride[2], ride[3]])
-        self.location = np.array([ride[2], ride[3]])
-        bonus = 0
-        if self.time + manhat_d <= ride[4]:
-            self.time = ride[4] + ride_len
-            bonus = self.bonus
-        else:
-            self.time = self.time + manhat_d + ride_len
-        self.rides.append(ride[-1])
-        self.score = self.score + ride_len + bonus
-
-    def eval_ride(self, ride, dist_weight, bonus_weight):
-        manhat_d = manhat_dist(self.location, [ride[0], ride[1]])
-        bonus = self.bonus if self.time + manhat_d <= ride[4] else 0
-        weight = (manhat_d * dist_weight) + (bonus * bonus_weight)
-        return weight
-
-    def __repr__(self):
-        return ("Taxi {} located at [{},{}] time {}".format(
-            self.taxi_num, self.location[0], self.location[1], self.time))
+from common import Fleet, RideSchedule
+from scoring import read_submission
+
+# Only needed to assign rides in batches
+try:
+    from scipy.optimize import linear_sum_assignment
+except:
+    pass
+
+
+def assign_in_windows(fleet, rides, window, dist_weight, bonus_weight):
+    """
+    Give rides, sorted by earliest start, to the fleet a window at a time.
+
+    The rides with an earliest start in the next window ticks, and any
+    from earlier windows which weren't given out, are matched to taxis all
+    at once at the least total Fleet.ride_costs, one ride per taxi.
+    Only taxis that can make one of the rides, and rides that one of the
+    taxis can make, are put in the cost matrix. A ride no taxi can make now
+    is dropped, as taxis only get further from making it.
+    """
+    earliest = rides["earliest"]
+    pending = np.empty(0, dtype=int)
+    pos, tick = 0, 0
+    while True:
+        if len(pending) == 0 and pos < len(rides):
+            tick = max(tick, int(earliest[pos]))
+        end = int(np.searchsorted(earliest, tick + window))
+        batch = np.concatenate((pending, np.arange(pos, end)))
+        pos, tick = end, tick + window
+        if len(batch) == 0:
+            if pos >= len(rides):
+                break
+            continue
+
+        cost = fleet.ride_costs(rides[batch], dist_weight, bonus_weight)
+        can = np.isfinite(cost)
+        keep = can.any(axis=0)
+        batch, cost, can = batch[keep], cost[:, keep], can[:, keep]
+        taxis = np.flatnonzero(can.any(axis=1))
+        cost, can = cost[taxis], can[taxis]
+        if len(taxis) > 0:
+            # Anything that can be made is better than something that can't
+            cost[~can] = cost[can].max() + 1
+        given = np.zeros(len(batch), dtype=bool)
+        for i, j in zip(*linear_sum_assignment(cost)):
+            if can[i, j]:
+                fleet.add_ride(int(taxis[i]), rides[batch[j]])
+                given[j] = True
+        pending = batch[~given]
+        if pos >= len(rides) and not given.any():
+            break
 
 
 def sean_solution(info, **kwargs):
     R, C, F, N, B, T, M = info
-    M_sorted = M[M[:, 4].argsort()]
+    M_sorted = M[M["earliest"].argsort()]
+    batch_window = kwargs.get("batch_window", 0)
 
     def objective(args):
-        taxis = [Taxi(R, C, B, i) for i in range(F)]
+        fleet = Fleet(F, B)
         dist_weight = args["dist_weight"]
         bonus_weight = args["bonus_weight"]
-        for ride in M_sorted:
-            best_dist, best_taxi = 100000000, None
-            for taxi in taxis:
-                can_reach, _ = taxi.can_reach(ride)
-                weight = taxi.eval_ride(ride, dist_weight, bonus_weight)
-                if can_reach and weight < best_dist:
-                    best_dist = weight
-                    best_taxi = taxi
-            if best_taxi is not None:
-                best_taxi.add_ride(ride)
-
-        result = [taxi.rides for taxi in taxis]
-        score = np.sum([taxi.score for taxi in taxis])
+        if batch_window > 0:
+            assign_in_windows(
+                fleet, M_sorted, batch_window, dist_weight, bonus_weight)
+        else:
+            for ride in M_sorted:
+                best_taxi = fleet.best_taxi(ride, dist_weight, bonus_weight)
+                if best_taxi != -1:
+                    fleet.add_ride(best_taxi, ride)
+
+        result = fleet.rides
+        score = int(fleet.score.sum())
         return {
             'loss': -score,
             'solution': result,
@@ -142,4 +114,25 @@ def sean_solution(info, **kwargs):
         args = kwargs.get("objective_args")
         best_res = objective(args)
 
+    # Optionally spend some time improving the best solution found
+    improve_time = kwargs.get("improve_time", 0)
+    if improve_time > 0:
+        schedule = RideSchedule(info, best_res["solution"])
+        schedule.improve(improve_time)
+        return schedule.solution(), schedule.score
+
     return best_res["solution"], best_res["score"]
+
+
+def improve_solution(info, **kwargs):
+    """
+    Improve the solution written by an earlier run for improve_time seconds.
+
+    The earlier solution is read from the start_dir output directory.
+    """
+    start_location = os.path.join(
+        kwargs["start_dir"], kwargs["input_name"][:-3] + ".out")
+    schedule = RideSchedule(info, read_submission(start_location, info[2]))
+    print("Starting from a score of", schedule.score)
+    schedule.improve(kwargs.get("improve_time", 10))
+    return schedule.solution(), schedule.score
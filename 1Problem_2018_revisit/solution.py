@@ -6,11 +6,12 @@ from datetime import datetime
 from time import time
 from copy import copy
 
-from utils import line_to_data, zip_dir, add_params
+from utils import line_to_data, zip_dir, add_params, load_input
+from common import read_rides
 # import your solution here
 # from matheus import matheus_solution
 # from ham import ham_solution
-from sean import sean_solution
+from sean import sean_solution, improve_solution
 from hyper_params import return_hyperparam_list
 
 
@@ -25,18 +26,13 @@ def read_file(input_location):
     N - number of rides
     B - per ride bonus for starting on time
     T - number of steps in the simulation
-    M - matrix consisting of N rows and 7 columns.
-        Each column describes a ride, and is structured as
-        (numbers indicate indices):
-        ride 6: from [0, 1] to [2, 3], earliest start 4, latest finish 5
+    M - array of the N rides, of common.ride_dtype, with fields
+        start, end, earliest, latest, id and length
     """
     with open(input_location, 'r') as f:
         R, C, F, N, B, T = line_to_data(
             f.readline(), np_array=False, dtype=int)
-        ride_info = np.zeros(shape=(N, 7))
-        for i in range(N):
-            ride_info[i][:-1] = line_to_data(f.readline(), dtype=int)
-            ride_info[i][-1] = i
+        ride_info = read_rides(f, N)
         info = (R, C, F, N, B, T, ride_info)
     return info
 
@@ -58,7 +54,7 @@ def print_solution(solution):
 def run(input_location, output_location, method, **kwargs):
     """Read the file, calculate solution, and write the results."""
     start_time = time()
-    info = read_file(input_location)
+    info = load_input(read_file, input_location)
     solution = method(info, **kwargs)
     solution, score = solution
     write_file(output_location, solution)
@@ -112,6 +108,7 @@ def main(method, filenames, parameter_list, do, seed=1):
 if __name__ == "__main__":
     """This is where things you should change are."""
     # Change the method here to the desired one
+    # improve_solution carries on from the outputs in a "start_dir" parameter
     method = sean_solution
     use_hyper_params = False
 
@@ -125,6 +122,12 @@ if __name__ == "__main__":
         parameter_list, "num_evals", [5, 40, 20, 10, 2])
     parameter_list = add_params(
         parameter_list, "search", not use_hyper_params)
+    # Seconds to spend improving each solution with local search
+    parameter_list = add_params(
+        parameter_list, "improve_time", 0)
+    # Ticks of rides to match to taxis at once, 0 gives out one at a time
+    parameter_list = add_params(
+        parameter_list, "batch_window", 0)
     if use_hyper_params:
         parameter_list = add_params(
             parameter_list, "objective_args", hyper_params)
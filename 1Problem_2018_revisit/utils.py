@@ -1,6 +1,10 @@
 import numpy as np
 import zipfile
 import os
+import io
+import pickle
+import hashlib
+import inspect
 
 
 def line_to_data(line, np_array=True, dtype=int):
@@ -33,6 +37,97 @@ def zip_dir(in_dir, out_loc, ext=None):
     print("Wrote zip file with source code to {}".format(out_loc))
 
 
+def parser_modules(read_fn):
+    """
+    Return the modules read_fn depends on, for the load_input cache key.
+
+    This is the module read_fn is defined in, along with any module next to it
+    that read_fn uses a name from, such as common for read_rides or StreetGraph.
+    Hashing the whole of these modules means a change to a helper read_fn calls,
+    or to a class it builds and is pickled, gives a new cache entry.
+    """
+    module = inspect.getmodule(read_fn)
+    if module is None:
+        return []
+    modules = [module]
+    here = os.path.dirname(os.path.abspath(inspect.getfile(read_fn)))
+
+    codes = [read_fn.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+        for name in code.co_names:
+            obj = read_fn.__globals__.get(name)
+            if obj is None:
+                continue
+            used = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+            location = getattr(used, "__file__", None)
+            if location is None or used in modules:
+                continue
+            if os.path.dirname(os.path.abspath(location)) == here:
+                modules.append(used)
+    return modules
+
+
+def load_input(read_fn, input_location, version=0):
+    """
+    Return read_fn(input_location), using a cache of parsed inputs.
+
+    The parsed result is saved in input_files/.cache as a .npz file,
+    named by the hash of the input file, version and the source of the
+    modules read_fn depends on (see parser_modules).
+    Increase version when the parsed result changes in a way those modules
+    don't show, such as a change to a third party library.
+    Numpy arrays are saved as arrays and anything else is pickled.
+    """
+    with open(input_location, "rb") as f:
+        hasher = hashlib.sha1(f.read())
+    hasher.update(str(version).encode())
+    for module in parser_modules(read_fn):
+        try:
+            hasher.update(inspect.getsource(module).encode())
+        except (OSError, TypeError):
+            hasher.update(module.__name__.encode())
+    cache_dir = os.path.join(os.path.dirname(input_location), ".cache")
+    cache_loc = os.path.join(
+        cache_dir, os.path.basename(input_location) + "_" + hasher.hexdigest() + ".npz"
+    )
+
+    if os.path.isfile(cache_loc):
+        with np.load(cache_loc) as data:
+            arrays = [data["arr_{}".format(i)] for i in range(len(data.files) - 1)]
+            unpickler = pickle.Unpickler(io.BytesIO(data["info"].tobytes()))
+        unpickler.persistent_load = lambda i: arrays[i]
+        return unpickler.load()
+
+    info = read_fn(input_location)
+
+    # Pull the arrays out of info as it is pickled, to save them natively
+    arrays, array_ids = [], {}
+
+    def persistent_id(obj):
+        if type(obj) is np.ndarray and obj.dtype != object:
+            if id(obj) not in array_ids:
+                array_ids[id(obj)] = len(arrays)
+                arrays.append(obj)
+            return array_ids[id(obj)]
+        return None
+
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(info)
+
+    # Write to a temporary file first, in case another run is reading it
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_loc = cache_loc[:-4] + "_{}.npz".format(os.getpid())
+    np.savez(
+        temp_loc, *arrays, info=np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+    )
+    os.replace(temp_loc, cache_loc)
+    return info
+
+
 def add_params(l, name, values):
     """
     Add values to l with key=name.
@@ -1,4 +1,6 @@
 """Please place things here which may be useful to everyone."""
+from heapq import heapify, heappop, heapreplace
+
 import numpy as np
 # Put books and libraries here
 
@@ -20,109 +22,177 @@ class General:
             self.idx))
 
 
-class Book:
-
-    def __init__(self, score, idx):
-        self.score = score
-        self.idx = idx
-        self.scanned = False
-
-    def __repr__(self):
-        return ("Book {} with score {}, scanned {}".format(
-            self.idx, self.score, self.scanned))
+class Catalogue:
+    """
+    The books and libraries as flat arrays, rather than an object for each.
 
+    Library l has books lib_books[lib_ptr[l]:lib_ptr[l + 1]], best first,
+    and book b is in libraries book_libs[book_ptr[b]:book_ptr[b + 1]].
+    A book has been scanned if its scanned_at is the current epoch,
+    so going back to nothing scanned only needs a new epoch.
+    """
 
-class Library:
-    def __init__(self, books, sign_time, books_per_day, days, idx):
-        self.books = books
-        self.sign_time = sign_time
-        self.books_per_day = books_per_day
-        self.signed_up = False
-        self.idx = idx
-        self.score = 0
-        self.max_days = days
+    def __init__(self, book_scores, library_info, D):
+        self.D = D
+        self.book_scores = np.asarray(book_scores, dtype=np.int32)
+        B, L = len(self.book_scores), len(library_info)
+        self.num_books = np.array(
+            [lib[1] for lib in library_info], dtype=np.int64)
+        self.sign_time = np.array(
+            [lib[2] for lib in library_info], dtype=np.int64)
+        self.books_per_day = np.array(
+            [lib[3] for lib in library_info], dtype=np.int64)
+        self.lib_ptr = np.zeros(L + 1, dtype=np.int64)
+        np.cumsum(self.num_books, out=self.lib_ptr[1:])
+        self.lib_of = np.repeat(np.arange(L), self.num_books)
+
+        # Best book first in each library, ties in the order they were given
+        books = np.concatenate(
+            [lib[4][:lib[1]] for lib in library_info] + [np.empty(0, np.int32)])
+        order = np.lexsort((-self.book_scores[books], self.lib_of))
+        self.lib_books = books[order].astype(np.int32)
+
+        order = np.argsort(self.lib_books, kind="stable")
+        self.book_ptr = np.zeros(B + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.lib_books, minlength=B), out=self.book_ptr[1:])
+        self.book_libs = self.lib_of[order].astype(np.int32)
+
+        self.scanned_at = np.zeros(B, dtype=np.int32)
+        self.epoch = 1
 
-    # TODO don't pass duplicate books
+    def __repr__(self):
+        return "Catalogue of {} books in {} libraries, {} scanned".format(
+            len(self.book_scores), len(self.sign_time),
+            np.count_nonzero(self.scanned()))
+
+    def reset(self):
+        """Go back to no books being scanned."""
+        self.epoch += 1
+
+    def scanned(self):
+        """Return which books have been scanned."""
+        return self.scanned_at == self.epoch
+
+    def scan(self, books):
+        self.scanned_at[books] = self.epoch
+
+    def total_score(self):
+        """Return the score of the books scanned so far."""
+        return int(self.book_scores[self.scanned()].sum(dtype=np.int64))
+
+    def max_books(self, t, libs=slice(None)):
+        """Return how many books libs could scan if signed up from day t."""
+        time_available = self.D - (t + self.sign_time[libs])
+        return np.clip(
+            time_available * self.books_per_day[libs], 0, self.num_books[libs])
+
+    def books_to_scan(self, lib, t):
+        """Return the best books lib can scan that aren't yet scanned."""
+        books = self.lib_books[self.lib_ptr[lib]:self.lib_ptr[lib + 1]]
+        books = books[self.scanned_at[books] != self.epoch]
+        return books[:self.max_books(t, lib)]
+
+    def library_score(self, lib, t):
+        """Return the score of books_to_scan and how many books there are."""
+        books = self.books_to_scan(lib, t)
+        return int(self.book_scores[books].sum(dtype=np.int64)), len(books)
+
+    def library_scores(self, t):
+        """
+        Return library_score for every library at once, as two arrays.
+
+        Counting the books not yet scanned along lib_books gives each
+        book's place among those left in its library, and only the first
+        max_books of them are added up.
+        """
+        left = self.scanned_at[self.lib_books] != self.epoch
+        num_left = np.concatenate(([0], np.cumsum(left)))
+        place = num_left[1:] - num_left[self.lib_ptr[:-1]][self.lib_of]
+        max_books = self.max_books(t)
+        take = left & (place <= max_books[self.lib_of])
+        total = np.concatenate(([0], np.cumsum(
+            np.where(take, self.book_scores[self.lib_books], 0),
+            dtype=np.int64)))
+        score = total[self.lib_ptr[1:]] - total[self.lib_ptr[:-1]]
+        counted = np.minimum(
+            num_left[self.lib_ptr[1:]] - num_left[self.lib_ptr[:-1]],
+            max_books)
+        return score, counted
+
+    def libraries_with(self, books):
+        """Return the libraries which have any of books, with repeats."""
+        starts, ends = self.book_ptr[books], self.book_ptr[books + 1]
+        lengths = ends - starts
+        offsets = np.repeat(ends - np.cumsum(lengths), lengths)
+        return self.book_libs[offsets + np.arange(len(offsets))]
+
+
+def sign_up_in_order(catalogue, order):
+    """
+    Sign up the libraries in order until out of days.
 
-    def max_books(self, t):
-        earliest_start_time = t + self.sign_time
-        time_available = self.max_days - earliest_start_time
-        if (time_available <= 0):
-            return 0
-        max_books = time_available * self.books_per_day
-        max_books = min(max_books, len(self.books))
-        return max_books
+    Returns (library, number of books, books) for each library
+    that scans any books.
+    """
+    curr_time = 0
+    end_info = []
+    for lib in order:
+        if curr_time >= catalogue.D:
+            break
+        books_to_scan = catalogue.books_to_scan(lib, curr_time)
+        if (len(books_to_scan) != 0):
+            catalogue.scan(books_to_scan)
+            end_info.append((lib, len(books_to_scan), books_to_scan.tolist()))
+        curr_time += int(catalogue.sign_time[lib])
+    return end_info
 
-    def calc_score(self, t, books):
-        max_books = self.max_books(t)
 
-        # TODO consider when need to sort
-        score = 0
-        i = 0
-        j = 0
-        while (j != max_books) and (i < (len(self.books))):
-            if not books[self.books[i]].scanned:
-                score += books[self.books[i]].score
-                j = j + 1
-            i = i + 1
-        self.score = score
-        self.calc_overall_score()
-
-    def books_to_scan(self, t, books):
-        max_books = self.max_books(t)
-        books_to_scan = []
-        i = 0
-        j = 0
-        # for book in books:
-        #     print(book)
-        while (j != max_books) and (i < (len(self.books))):
-            if not books[self.books[i]].scanned:
-                # print("adding book {} to lib {}".format(
-                #     self.books[i], self.idx
-                # ))
-                books_to_scan.append(self.books[i])
-                j = j + 1
-            i = i + 1
-        # print("loop ended with j: {} and i: {}".format(j, i))
-        # print("max books are", max_books)
-        return books_to_scan
-
-    def calc_overall_score(self):
-        self.overall_score = (
-            self.a * self.score / (self.sign_time ** self.b))
-
-    def set_args(self, args):
-        self.a, self.b = args
+def sign_up_by_score(catalogue, a=1, b=1):
+    """
+    Sign up the library with the best overall score left, until out of days.
+
+    The overall score is a * score / sign_time ** b.
+    Scores only go down as books are scanned and days go by, so the
+    libraries are kept in a heap on the score they last had, and the top
+    one is only scored again if it might have changed. That is if one of
+    its books has been scanned, found from catalogue.libraries_with,
+    or if it can now scan fewer books than it counted.
+    Ties go to the lowest numbered library.
+    Returns the books scanned by each library, as in sign_up_in_order.
+    """
+    sign_time = catalogue.sign_time.tolist()
+    score, counted = catalogue.library_scores(0)
+    counted = counted.tolist()
+    stale = np.zeros(len(sign_time), dtype=bool)
+    heap = list(zip(
+        (-(a * score / catalogue.sign_time ** b)).tolist(),
+        range(len(sign_time))))
+    heapify(heap)
 
-    def __repr__(self):
-        return ("Library {} with books {}, takes {} to sign up, {} books per day, is signed up {}".format(
-            self.idx, self.books, self.sign_time, self.books_per_day, self.signed_up))
+    curr_time = 0
+    end_info = []
+    while curr_time < catalogue.D and len(heap) > 0:
+        lib = heap[0][1]
+        if stale[lib] or catalogue.max_books(curr_time, lib) < counted[lib]:
+            score, counted[lib] = catalogue.library_score(lib, curr_time)
+            stale[lib] = False
+            heapreplace(heap, (-(a * score / sign_time[lib] ** b), lib))
+            continue
+        heappop(heap)
+
+        books_to_scan = catalogue.books_to_scan(lib, curr_time)
+        if (len(books_to_scan) != 0):
+            catalogue.scan(books_to_scan)
+            stale[catalogue.libraries_with(books_to_scan)] = True
+            end_info.append((lib, len(books_to_scan), books_to_scan.tolist()))
+        curr_time += sign_time[lib]
+    return end_info
 
 
 def solve(info, **kwargs):
     (B, L, D, book_scores, library_info) = info
-
-    # Make the books
-    books = []
-    for i in range(B):
-        books.append(Book(book_scores[i], i))
-
-    # Make the libraries
-    libraries = []
-    for i in range(L):
-        idx, N, T, M, book_ids = library_info[i]
-        lib_books = []
-        for i in range(N):
-            book_idx = book_ids[i]
-            lib_books.append(book_idx)
-        sorted_lib_books = sorted(
-            lib_books, key=lambda x: books[x].score, reverse=True)
-        library = Library(sorted_lib_books, T, M, D, idx)
-        libraries.append(library)
-
-    sorted_libraries = libraries
-    curr_time = 0
-    end_info = []
+    catalogue = Catalogue(book_scores, library_info, D)
 
     if np.mean(book_scores) == book_scores[0]:
         print('not sorting')
@@ -130,43 +200,13 @@ def solve(info, **kwargs):
     else:
         should_sort = True
 
-    for lib in sorted_libraries:
-        lib.set_args((1, 1))
-
-    if not should_sort:
-        for lib in sorted_libraries:
-            lib.calc_score(curr_time, books)
-
-        sorted_libraries = sorted(
-            sorted_libraries, key=lambda x: x.overall_score, reverse=True)
-        # sorted_libraries = sorted(
-        #     sorted_libraries, key=lambda x: x.sign_time)
-
-    while curr_time < D:
-        if should_sort:
-            for lib in sorted_libraries:
-                lib.calc_score(curr_time, books)
-
-            sorted_libraries = sorted(
-                sorted_libraries, key=lambda x: x.overall_score, reverse=True)
-        best_lib = sorted_libraries[0]
-        books_to_scan = best_lib.books_to_scan(curr_time, books)
-        if (len(books_to_scan) != 0):
-            book_ids_out = []
-            for b in books_to_scan:
-                book_ids_out.append(b)
-                books[b].scanned = True
-            info_to_ret = (best_lib.idx, len(books_to_scan), book_ids_out)
-            end_info.append(info_to_ret)
-
-        if len(sorted_libraries) == 1:
-            break
-        curr_time += best_lib.sign_time
-        sorted_libraries = sorted_libraries[1:]
-
-    score = 0
-    for b in books:
-        if b.scanned:
-            score += b.score
+    if should_sort:
+        end_info = sign_up_by_score(catalogue)
+    else:
+        score, _ = catalogue.library_scores(0)
+        overall_score = score / catalogue.sign_time
+        # Stable, so ties stay in library order
+        sorted_libraries = np.argsort(-overall_score, kind="stable")
+        end_info = sign_up_in_order(catalogue, sorted_libraries.tolist())
 
-    return end_info, score
+    return end_info, catalogue.total_score()
@@ -21,6 +21,7 @@ import numpy as np
 from utils import line_to_data
 from utils import zip_dir
 from utils import add_params
+from utils import load_input
 from hyper_params import return_hyperparam_list
 
 # import your solution here
@@ -119,7 +120,7 @@ def run(input_location, output_location, method, **kwargs):
 
     """
     start_time = time()
-    info = read_file(input_location)
+    info = load_input(read_file, input_location)
     solution, score = method(info, **kwargs)
     print_solution(solution)
     write_file(output_location, solution)
@@ -1,72 +1,372 @@
 """Please place things here which may be useful to everyone."""
 
+from bisect import bisect_left, insort
+from heapq import heappush, heappop
+
 import numpy as np
 
-def scorer(solution, D, F):
+
+def csr_from_keys(keys, num_rows):
+    """
+    Group positions by key, in CSR form.
+
+    Returns ptr, idx where idx[ptr[r]:ptr[r + 1]] are the positions
+    at which keys == r, in their original order.
+
+    """
+    idx = np.argsort(keys, kind="stable").astype(np.int32)
+    ptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_rows), out=ptr[1:])
+    return ptr, idx
+
+
+class StreetGraph:
+    """
+    Index based view of the city, built once by read_file.
+
+    Streets are referred to by their position in the input,
+    and names maps these back to the street names used in the output.
+    The incoming streets of intersection i are
+    in_streets[in_ptr[i]:in_ptr[i + 1]], and outgoing streets work the same.
+    Car paths are stored the same way in path_streets and path_ptr.
+
+    """
+
+    def __init__(
+        self, I, names, start, end, length, path_ptr, path_streets, name_to_id=None
+    ):
+        self.names = names
+        if name_to_id is None:
+            name_to_id = {name: i for i, name in enumerate(names)}
+        self.name_to_id = name_to_id
+        self.start = start
+        self.end = end
+        self.length = length
+        self.in_ptr, self.in_streets = csr_from_keys(end, I)
+        self.out_ptr, self.out_streets = csr_from_keys(start, I)
+        self.path_ptr = path_ptr
+        self.path_streets = path_streets
+
+        # How many times each street appears in the car paths
+        self.car_counts = np.bincount(path_streets, minlength=len(names))
+
+    @classmethod
+    def from_lists(cls, I, street_info, car_info):
+        """Build from lists of [B, E, name, L] streets and [P, names...] cars."""
+        names = [s[2] for s in street_info]
+        name_to_id = {name: i for i, name in enumerate(names)}
+        start, end, length = (
+            np.array([s[j] for s in street_info], dtype=np.int32) for j in (0, 1, 3)
+        )
+        path_ptr = np.zeros(len(car_info) + 1, dtype=np.int64)
+        np.cumsum([c[0] for c in car_info], out=path_ptr[1:])
+        path_streets = np.array(
+            [name_to_id[name] for c in car_info for name in c[1:]], dtype=np.int32
+        )
+        return cls(I, names, start, end, length, path_ptr, path_streets)
+
+    def incoming(self, i):
+        """Return the ids of the streets ending at intersection i."""
+        return self.in_streets[self.in_ptr[i] : self.in_ptr[i + 1]]
+
+    def outgoing(self, i):
+        """Return the ids of the streets starting at intersection i."""
+        return self.out_streets[self.out_ptr[i] : self.out_ptr[i + 1]]
+
+    def path(self, c):
+        """Return the ids of the streets car c drives along."""
+        return self.path_streets[self.path_ptr[c] : self.path_ptr[c + 1]]
+
+    def paths(self):
+        """Return every car path as a list of lists, quicker to loop over."""
+        flat = self.path_streets.tolist()
+        ptr = self.path_ptr.tolist()
+        return [flat[ptr[c] : ptr[c + 1]] for c in range(len(ptr) - 1)]
+
+    def __repr__(self):
+        return "StreetGraph with {} intersections, {} streets and {} cars".format(
+            len(self.in_ptr) - 1, len(self.names), len(self.path_ptr) - 1
+        )
+
+
+def phase_table(solution, street_ids, num_streets):
+    """
+    Return the green light phase of every street under solution.
+
+    Street s is green whenever (t % cycle[s]) lies in
+    [green_start[s], green_start[s] + green_len[s]).
+    Streets that are not in the schedule have a green_len of 0.
+
+    """
+    green_start = np.zeros(num_streets, dtype=np.int64)
+    green_len = np.zeros(num_streets, dtype=np.int64)
+    cycle = np.ones(num_streets, dtype=np.int64)
+    for line in solution:
+        lights = line[2:]
+        if len(lights) == 0:
+            continue
+        ids = np.array([street_ids[name] for name, _ in lights], dtype=np.int64)
+        times = np.array([t for _, t in lights], dtype=np.int64)
+        ends = np.cumsum(times)
+        if ends[-1] == 0:
+            continue
+        green_start[ids] = ends - times
+        green_len[ids] = times
+        cycle[ids] = ends[-1]
+    return green_start, green_len, cycle
+
+
+def next_green(t, start, length, cycle):
+    """Return the first time >= t that the street is green, None if never."""
+    if length == 0:
+        return None
+    r = t % cycle
+    if r < start:
+        return t + start - r
+    if r < start + length:
+        return t
+    return t + cycle - r + start
+
+
+def scorer(solution, input_info):
     """
     Award points for each car that finished its journey.
-    
+
     Score is:
     For each car
     F + (D - T), where F is fixed bonus,
     and D - T is the time left in the simulation.
 
+    This is event driven rather than stepping every second.
+    Each street keeps the earliest time its queue can next let a car through,
+    and cars are processed in the order they reach the end of a street,
+    so the queues are always served first in first out.
+
     """
+    D, I, S, V, F, graph = input_info
+
+    lengths = graph.length.tolist()
+    paths = graph.paths()
+    green_start, green_len, cycle = (
+        arr.tolist() for arr in phase_table(solution, graph.name_to_id, S)
+    )
+
+    # Every car starts queued at the end of its first street,
+    # with the queue ordered by car number.
+    heap = [(0, c, 0) for c in range(V)]
+    next_free = [0] * S
     score = 0
-    # for each car in the solution
+    while heap:
+        t, c, k = heappop(heap)
+        s = paths[c][k]
+        cross = next_green(
+            max(t, next_free[s]), green_start[s], green_len[s], cycle[s]
+        )
+        if cross is None or cross >= D:
+            continue
+        next_free[s] = cross + 1
+
+        arrive = cross + lengths[paths[c][k + 1]]
+        if arrive > D:
+            continue
+        if k + 2 == len(paths[c]):
+            score += F + (D - arrive)
+        else:
+            heappush(heap, (arrive, c, k + 1))
+
     return score
 
 
+class IncrementalScorer:
+    """
+    Score a schedule, then cheaply re-score it after changing one intersection.
+
+    For every street this records the cars that queue at its end,
+    with when they arrived and when they crossed.
+    Changing the schedule at one intersection only re-simulates the cars
+    that queued at it, from their first visit onwards.
+    Any other car is only revisited if it shared a queue with one of these
+    and its crossing time actually changed as a result.
+
+    """
+
+    def __init__(self, solution, input_info):
+        D, I, S, V, F, graph = input_info
+        self.D = D
+        self.F = F
+        self.graph = graph
+        self.street_ids = graph.name_to_id
+        self.lengths = graph.length.tolist()
+        self.paths = graph.paths()
+
+        self.lines = {line[0]: line for line in solution}
+        self.green_start, self.green_len, self.cycle = (
+            arr.tolist() for arr in phase_table(solution, self.street_ids, S)
+        )
+
+        # queues[s] holds (arrival, car, step) in the order cars leave street s
+        # arrivals[c][k] and crossings[c][k] are when car c reached the end of
+        # its k-th street and when it crossed that intersection.
+        # Crossings at or after D are all stored as D.
+        self.queues = [[] for _ in range(S)]
+        self.arrivals = [[] for _ in range(V)]
+        self.crossings = [[] for _ in range(V)]
+        self.score = 0
+        self.heap = []
+        for c in range(V):
+            self._add_arrival(c, 0, 0)
+        self._run()
+
+    def solution(self):
+        """Return the schedule currently being scored."""
+        return list(self.lines.values())
+
+    def update(self, line):
+        """Replace the schedule of intersection line[0] with line and re-score."""
+        i = line[0]
+        self.lines[i] = line
+        for s in self.graph.incoming(i).tolist():
+            self.green_len[s] = 0
+        lights = line[2:]
+        offset = 0
+        for name, t in lights:
+            s = self.street_ids[name]
+            self.green_start[s] = offset
+            self.green_len[s] = int(t)
+            offset += int(t)
+        for name, _ in lights:
+            self.cycle[self.street_ids[name]] = max(offset, 1)
+
+        for s in self.graph.incoming(i).tolist():
+            for entry in self.queues[s]:
+                heappush(self.heap, entry)
+        self._run()
+        return self.score
+
+    def _add_arrival(self, c, k, t):
+        self.arrivals[c].append(t)
+        self.crossings[c].append(None)
+        if k == len(self.paths[c]) - 1:
+            self.score += self.F + (self.D - t)
+        else:
+            entry = (t, c, k)
+            insort(self.queues[self.paths[c][k]], entry)
+            heappush(self.heap, entry)
+
+    def _remove_from(self, c, k):
+        """Forget where car c went from its k-th street onwards."""
+        path = self.paths[c]
+        for j in range(len(self.arrivals[c]) - 1, k - 1, -1):
+            t = self.arrivals[c][j]
+            if j == len(path) - 1:
+                self.score -= self.F + (self.D - t)
+                continue
+            queue = self.queues[path[j]]
+            pos = bisect_left(queue, (t, c, j))
+            del queue[pos]
+            # The car behind may now be able to cross sooner
+            if pos < len(queue):
+                heappush(self.heap, queue[pos])
+        del self.arrivals[c][k:]
+        del self.crossings[c][k:]
+
+    def _run(self):
+        D = self.D
+        while self.heap:
+            t, c, k = heappop(self.heap)
+            if k >= len(self.arrivals[c]) or self.arrivals[c][k] != t:
+                continue
+            path = self.paths[c]
+            s = path[k]
+            queue = self.queues[s]
+            pos = bisect_left(queue, (t, c, k))
+
+            next_free = 0
+            if pos > 0:
+                _, prev_c, prev_k = queue[pos - 1]
+                next_free = self.crossings[prev_c][prev_k] + 1
+            cross = None
+            if next_free <= D:
+                cross = next_green(
+                    max(t, next_free),
+                    self.green_start[s],
+                    self.green_len[s],
+                    self.cycle[s],
+                )
+            cross = D if cross is None else min(cross, D)
+            if cross == self.crossings[c][k]:
+                continue
+
+            self.crossings[c][k] = cross
+            if pos + 1 < len(queue):
+                heappush(self.heap, queue[pos + 1])
+            self._remove_from(c, k + 1)
+            if cross < D:
+                arrive = cross + self.lengths[path[k + 1]]
+                if arrive <= D:
+                    self._add_arrival(c, k + 1, arrive)
+
+
+def hill_climb(solution, input_info, num_iters):
+    """
+    Tweak one random intersection at a time, keeping tweaks that don't lose points.
+
+    A tweak either swaps two lights or changes one light's duration by one.
+
+    """
+    incremental = IncrementalScorer(solution, input_info)
+    choices = [line[0] for line in solution if len(line) > 3]
+    if len(choices) == 0:
+        return incremental.solution(), incremental.score
+
+    for _ in range(num_iters):
+        line = incremental.lines[choices[np.random.randint(len(choices))]]
+        lights = list(line[2:])
+        a, b = np.random.choice(len(lights), 2, replace=False)
+        if np.random.rand() < 0.5:
+            lights[a], lights[b] = lights[b], lights[a]
+        else:
+            name, t = lights[a]
+            lights[a] = (name, max(1, int(t) + np.random.choice([-1, 1])))
+        old_score = incremental.score
+        if incremental.update([line[0], len(lights)] + lights) < old_score:
+            incremental.update(line)
+
+    return incremental.solution(), incremental.score
+
+
 def dumb_solution(input_info, **kwargs):
-    D, I, S, V, F, street_info, car_info = input_info
+    D, I, S, V, F, graph = input_info
 
     solution = []
 
-    def find_streets_at_intersection(intersection_idx, street_info):
-        starting_streets = []
-        
-        for street in street_info:
-            if street[1] == intersection_idx:
-                starting_streets.append(street)
-        
-        return starting_streets
-
     # Loop through the intersections
 
     for i in range(I):
-        starting_streets = find_streets_at_intersection(i, street_info)
+        starting_streets = graph.incoming(i)
         num_streets = len(starting_streets)
         num_lights = min(num_streets, D)
         line_to_append = [i, num_lights]
         if len(starting_streets) != 0:
             for j in range(num_streets):
                 if j <= D:
-                    street_name = starting_streets[j][2]
+                    street_name = graph.names[starting_streets[j]]
                     line_to_append.append((street_name, 1))
                 # Also want to try D / num_streets
             solution.append(line_to_append)
 
-    return solution, 0
+    return solution, scorer(solution, input_info)
 
 
 def random_solution(input_info, **kwargs):
-    D, I, S, V, F, street_info, car_info = input_info
+    D, I, S, V, F, graph = input_info
 
     solution = []
 
-    def find_streets_at_intersection(intersection_idx, street_info):
-        starting_streets = []
-        
-        for street in street_info:
-            if street[1] == intersection_idx:
-                starting_streets.append(street)
-        
-        return starting_streets
-
     # Loop through the intersections
 
     for i in range(I):
-        starting_streets = find_streets_at_intersection(i, street_info)
+        starting_streets = graph.incoming(i)
         num_streets = len(starting_streets)
         num_lights = min(num_streets, D)
         random_times = np.random.randint(1, np.floor(D / num_lights), num_lights)
@@ -74,9 +374,9 @@ def random_solution(input_info, **kwargs):
         # put the first light into line_to_append
         # iterate over the other lights
         for j in range(num_lights):
-            street_name = starting_streets[j][2]
+            street_name = graph.names[starting_streets[j]]
             line_to_append.append((street_name, random_times[j]))
             # Also want to try D / num_streets
         solution.append(line_to_append)
 
-    return solution, 0
+    return solution, scorer(solution, input_info)
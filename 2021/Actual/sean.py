@@ -9,7 +9,8 @@ try:
 except:
     pass
 
-from utils import save_object
+from utils import parallel_fmin, load_trials, store_trials
+from common import scorer, hill_climb
 
 # TODO Put classes here that may be useful to store info in
 
@@ -66,22 +67,16 @@ class Intersection:
         self.best_times = []
         self.D = 0
 
-    def find_streets_at_intersection(self, street_info, D):
-        starting_streets = []
-
-        for street in street_info:
-            if street[1] == self.id:
-                starting_streets.append(street)
-
-        self.streets = starting_streets
-        self.num_streets = len(starting_streets)
+    def find_streets_at_intersection(self, graph, D):
+        self.streets = graph.incoming(self.id)
+        self.num_streets = len(self.streets)
         self.max_lights = min(self.num_streets, D)
         self.D = D
 
-    def weight_streets(self, street_dict):
+    def weight_streets(self, street_list):
         scores = np.zeros(self.num_streets)
         for i, s in enumerate(self.streets):
-            scores[i] = street_dict[s[2]].score
+            scores[i] = street_list[s].score
         scores = scores / np.sum(scores)
 
         self.street_weights = scores
@@ -140,27 +135,23 @@ def sean_solution(input_info, **kwargs):
     """
     # TODO main body part here - especially setup
 
-    D, I, S, V, F, street_info, car_info = input_info
-
-    s_dict = {}
-    for s in street_info:
-        s_dict[s[2]] = Street(*s)
-
-    # Find busy streets
-    for c in car_info:
-        paths = c[1:]
-        for p in paths:
-            s_dict[p].cars_using += 1
+    D, I, S, V, F, graph = input_info
 
-    for s in s_dict.values():
-        s.calc_score()
-        # print(s)
+    s_list = []
+    for i in range(S):
+        street = Street(
+            graph.start[i], graph.end[i], graph.names[i], graph.length[i]
+        )
+        # Find busy streets
+        street.cars_using = graph.car_counts[i]
+        street.calc_score()
+        s_list.append(street)
 
     inter_list = []
     for i in range(I):
         intersection = Intersection(i)
-        intersection.find_streets_at_intersection(street_info, D)
-        intersection.weight_streets(s_dict)
+        intersection.find_streets_at_intersection(graph, D)
+        intersection.weight_streets(s_list)
         intersection.find_street_times()
         inter_list.append(intersection)
 
@@ -177,7 +168,7 @@ def sean_solution(input_info, **kwargs):
 
         for I in inter_list:
             num_lights = len(I.best_times)
-            street_names = [s[2] for s in I.streets]
+            street_names = [graph.names[s] for s in I.streets]
             line_to_append = [I.id, num_lights]
             idxs = [i for i in range(len(street_names))]
             sorted_idx = [x for x, _ in sorted(zip(idxs, I.best_times), key=lambda pair: pair[1], reverse=True)]
@@ -187,7 +178,12 @@ def sean_solution(input_info, **kwargs):
                 line_to_append.append((name, time_val))
             solution.append(line_to_append)
 
-        score = 0
+        # Optionally improve the schedule one intersection at a time
+        climb_iters = args.get("climb_iters", 0)
+        if climb_iters > 0:
+            solution, score = hill_climb(solution, input_info, climb_iters)
+        else:
+            score = scorer(solution, input_info)
 
         # Return something flexible that can be used with hyperopt
         # Main point is that it has score and solution.
@@ -201,7 +197,11 @@ def sean_solution(input_info, **kwargs):
 
     # Ignore this bit if not searching hyper_parameters!
     if kwargs.get("search", True):
-        trials = Trials()
+        # Warm-start from earlier runs on this input, kept next to the outputs
+        store_location = os.path.join(
+            os.path.dirname(kwargs["output_dir"]), "trials.db"
+        )
+        trials = load_trials(store_location, kwargs["input_name"], "sean_solution")
 
         # TODO Setup what values the args searching over can have
         space = hp.choice(
@@ -211,24 +211,21 @@ def sean_solution(input_info, **kwargs):
 
         # TODO If you know the best you do, pass loss_threshold=-best
         # Do hyper-param searching - possible pass per filename num_evals
-        best = fmin(
+        best = parallel_fmin(
             objective,
             space=space,
-            algo=tpe.suggest,
-            max_evals=kwargs.get("num_evals", 10),
+            max_evals=len(trials) + kwargs.get("num_evals", 10),
             trials=trials,
+            num_workers=kwargs.get("num_workers", None),
         )
 
         # Get the best hyper-params from fmin
         print("Best hyper-parameters found were:", best)
         args = space_eval(space, best)
 
-        # Save the trials to disk
+        # Add the trials to the store
         # These trials can be printed using print_trial_info in utils
-        out_name = os.path.join(
-            kwargs["output_dir"], "_" + kwargs["input_name"][:-2] + "pkl"
-        )
-        save_object(trials, out_name)
+        store_trials(store_location, kwargs["input_name"], "sean_solution", trials)
 
     else:
         # By default, this is just an empty dictionary.
@@ -16,6 +16,8 @@ from datetime import datetime
 from time import time
 from copy import copy
 import traceback
+from array import array
+from itertools import islice
 from pprint import pprint
 
 import numpy as np
@@ -23,6 +25,7 @@ import numpy as np
 from utils import line_to_data
 from utils import zip_dir
 from utils import add_params
+from utils import load_input
 from hyper_params import return_hyperparam_list
 
 # import your solution here
@@ -42,7 +45,7 @@ except Exception as e:
     print(e, "occurred in sean file, printing trace:")
     traceback.print_exc()
 
-from common import dumb_solution, random_solution
+from common import dumb_solution, random_solution, StreetGraph
 
 
 def read_file(input_location):
@@ -65,32 +68,41 @@ def read_file(input_location):
         # D - duration, I - num intersections, S - num streets
         # V - num cars, F - bonus score for cars reaching destination
         D, I, S, V, F = line_to_data(f.readline(), np_array=False, dtype=int)
-        
+
         # Next S lines contain descriptions of the streets
-        street_info = []
-        for _ in range(S):
         # line: B E NAME L
         # B, E - intersections at start and end of street
         # Name - string consisting of between 3 and 30
         # L - the time it takes a car to traverse the street
-            B, E, S_Name, L = line_to_data(f.readline(), np_array=False, dtype=str)
-            B = int(B)
-            E = int(E)
-            L = int(L)
-            street_info.append([B, E, S_Name, L])
+        tokens = "".join(islice(f, S)).split()
+        names = tokens[2::4]
+        name_to_id = {name: i for i, name in enumerate(names)}
+        start = np.array(tokens[0::4], dtype=np.int32)
+        end = np.array(tokens[1::4], dtype=np.int32)
+        length = np.array(tokens[3::4], dtype=np.int32)
+        del tokens
 
         # Next V lines describe the paths of each car
         # line: P P_names
         # P - the number of streets the car needs to travel
         # Space separated names of the streets in order (P of these)
-        car_info = []
-        for _ in range(V):
-            line_info = line_to_data(f.readline(), np_array=False, dtype=str)
-            P = int(line_info[0])
-            line_info = [P,] + line_info[1:]
-            car_info.append(line_info)
-    
-        input_info = (D, I, S, V, F, street_info, car_info)
+        # The paths are stored as street ids back to back,
+        # car c being path_streets[path_ptr[c]:path_ptr[c + 1]]
+        path_ptr = np.zeros(V + 1, dtype=np.int64)
+        path_streets = array("i")
+        for c, line in enumerate(islice(f, V)):
+            line_info = line.split()
+            path_ptr[c + 1] = path_ptr[c] + int(line_info[0])
+            path_streets.extend(
+                map(name_to_id.__getitem__, islice(line_info, 1, None))
+            )
+        path_streets = np.frombuffer(path_streets, dtype=np.int32)
+
+    # Index the streets once so solutions don't need to search for them
+    graph = StreetGraph(
+        I, names, start, end, length, path_ptr, path_streets, name_to_id
+    )
+    input_info = (D, I, S, V, F, graph)
 
     return input_info
 
@@ -167,7 +179,7 @@ def run(input_location, output_location, method, **kwargs):
 
     """
     start_time = time()
-    input_info = read_file(input_location)
+    input_info = load_input(read_file, input_location)
     solution, score = method(input_info, **kwargs)
     write_file(output_location, solution)
     print("\tCompleted in {:.2f} seconds".format(time() - start_time))
@@ -9,6 +9,7 @@ from time import time
 from solution import print_solution
 from sean import sean_solution
 from solution import write_file
+from common import scorer, StreetGraph
 
 
 def test_method(method, input_info, **kwargs):
@@ -28,6 +29,29 @@ def test_file_writer():
     write_location = "test_out.txt"
     write_file(write_location, to_write)
 
+def test_scorer():
+    """The example from the problem statement, which scores 1002."""
+    street_info = [
+        [2, 0, "rue-de-londres", 1],
+        [0, 1, "rue-d-amsterdam", 1],
+        [3, 1, "rue-d-athenes", 1],
+        [2, 3, "rue-de-rome", 2],
+        [1, 2, "rue-de-moscou", 3],
+    ]
+    car_info = [
+        [4, "rue-de-londres", "rue-d-amsterdam", "rue-de-moscou", "rue-de-rome"],
+        [3, "rue-d-athenes", "rue-de-moscou", "rue-de-londres"],
+    ]
+    graph = StreetGraph.from_lists(4, street_info, car_info)
+    input_info = (6, 4, 5, 2, 1000, graph)
+    solution = [
+        [1, 2, ("rue-d-athenes", 2), ("rue-d-amsterdam", 1)],
+        [0, 1, ("rue-de-londres", 2)],
+        [2, 1, ("rue-de-moscou", 1)]
+    ]
+    print("Score is {}, expected 1002".format(scorer(solution, input_info)))
+
+
 def test_opt():
     def objective(args):
         case, val = args
@@ -60,3 +84,4 @@ if __name__ == "__main__":
     # test_method(sean_solution, info)
     # test_opt()
     test_file_writer()
+    test_scorer()
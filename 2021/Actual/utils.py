@@ -7,9 +7,24 @@ not need to know how the existing functions work.
 import pickle
 import zipfile
 import os
+import io
+import hashlib
+import inspect
+import json
+import sqlite3
+import multiprocessing
+from contextlib import closing
+from itertools import groupby
 
 import numpy as np
 
+# In case doing hyperparam opt
+try:
+    from hyperopt import tpe, base, Trials, space_eval, STATUS_OK, JOB_STATE_DONE
+    from hyperopt.utils import coarse_utcnow
+except:
+    pass
+
 
 def line_to_data(line, np_array=True, dtype=int):
     """
@@ -49,7 +64,23 @@ def zip_dir(in_dir, out_loc, ext=None):
     print("Wrote zip file with source code to {}".format(out_loc))
 
 def print_trial_info(in_dir):
-    """Print hyperopt.Trials() info loaded via pickle."""
+    """
+    Print hyperopt.Trials() info loaded via pickle.
+
+    in_dir can instead be the path to a trial store written by store_trials,
+    in which case the results of every run are printed, best first.
+    """
+    if in_dir[-3:] == ".db":
+        with closing(sqlite3.connect(in_dir)) as conn:
+            rows = conn.execute(
+                "SELECT input_name, solver, vals, loss FROM trials "
+                "ORDER BY input_name, solver, loss"
+            ).fetchall()
+        for (input_name, solver), group in groupby(rows, key=lambda r: r[:2]):
+            print("For {} using {}:".format(input_name, solver))
+            for _, _, vals, loss in group:
+                print("\t{}: Loss {}".format(vals, loss))
+        return
     for f in os.listdir(in_dir):
         if f[-3:] == "pkl":
             with open(os.path.join(in_dir, f), "rb") as inp:
@@ -65,6 +96,319 @@ def save_object(obj, out_name):
         pickle.dump(obj, output, pickle.HIGHEST_PROTOCOL)
 
 
+# Set in the parent just before forking, so workers inherit it (and the
+# parsed input it closes over) without it needing to be pickled.
+_pool_objective = None
+
+
+def _pool_evaluate(args):
+    """Evaluate the forked objective on args in a worker process."""
+    return _pool_objective(args)
+
+
+def parallel_fmin(
+    objective, space, max_evals, trials=None, num_workers=None, batch_size=None
+):
+    """
+    Search over space like hyperopt.fmin with tpe, evaluating in parallel.
+
+    Suggestions are made batch_size at a time, each from its own tpe call
+    with its own seed, and each batch is evaluated across num_workers
+    forked processes. The suggestions in a batch don't see each other's
+    results, so a batch is a little less directed than fmin would be.
+    Parameter sets which already have a result in trials, such as those
+    loaded by load_trials, are not evaluated again or added to trials,
+    so max_evals only counts fresh evaluations.
+    The results are stored in trials as fmin would store them,
+    so trials can be saved and read with print_trial_info as normal.
+    Evaluates in this process if fork is unavailable or num_workers is 1.
+
+    Parameters
+    ----------
+    objective : function
+        Takes a point from space and returns a hyperopt result dict.
+    space : hyperopt space
+        The space to search over.
+    max_evals : int
+        How many evaluations to have in trials when finished.
+    trials : hyperopt.Trials, optional
+        Where to store the results, by default a new Trials().
+    num_workers : int, optional
+        How many processes to use, by default the number of cpus.
+    batch_size : int, optional
+        How many suggestions to make at a time, by default num_workers.
+
+    Returns
+    -------
+    dict : best
+        The best point found, to be used with space_eval as from fmin.
+
+    """
+    global _pool_objective
+    if trials is None:
+        trials = Trials()
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if batch_size is None:
+        batch_size = num_workers
+
+    # Results so far, so the same parameters are never evaluated twice
+    known = {
+        _vals_key(doc["misc"]["vals"]): doc["result"]
+        for doc in trials.trials
+        if doc["result"].get("status") == STATUS_OK
+    }
+
+    domain = base.Domain(objective, space)
+    pool = None
+    if num_workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        _pool_objective = objective
+        pool = multiprocessing.get_context("fork").Pool(num_workers)
+    try:
+        while len(trials) < max_evals:
+            num_new = min(batch_size, max_evals - len(trials))
+            new_ids = trials.new_trial_ids(num_new)
+            trials.refresh()
+            # Past its random start, tpe only suggests for the first id it is
+            # given, so ask for each id on its own with a different seed.
+            # The seed includes the id, as np.random is seeded the same way
+            # every run and a warm-started search would otherwise suggest
+            # the points the last run tried. A point which has been tried
+            # is suggested again, a few times at most, and then left out.
+            docs, keys, points = [], [], {}
+            for new_id in new_ids:
+                for _ in range(10):
+                    seed = (np.random.randint(2 ** 31) + new_id) % (2 ** 31)
+                    new_docs = tpe.suggest([new_id], domain, trials, seed)
+                    if len(new_docs) != 1:
+                        raise RuntimeError(
+                            "tpe gave {} suggestions, not 1".format(len(new_docs)))
+                    key = _vals_key(new_docs[0]["misc"]["vals"])
+                    if key not in known and key not in points:
+                        break
+                else:
+                    continue
+                vals = {
+                    k: v[0] for k, v in new_docs[0]["misc"]["vals"].items() if v}
+                points[key] = space_eval(space, vals)
+                docs.append(new_docs[0])
+                keys.append(key)
+            if len(docs) == 0:
+                print("\tStopping search, no new points to try")
+                break
+
+            start_time = coarse_utcnow()
+            if pool is not None:
+                results = pool.map(_pool_evaluate, list(points.values()))
+            else:
+                results = [objective(point) for point in points.values()]
+            known.update(zip(points.keys(), results))
+
+            for key, doc in zip(keys, docs):
+                doc["state"] = JOB_STATE_DONE
+                doc["result"] = known[key]
+                doc["book_time"] = start_time
+                doc["refresh_time"] = coarse_utcnow()
+            trials.insert_trial_docs(docs)
+            trials.refresh()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        _pool_objective = None
+    return trials.argmin
+
+
+def _vals_key(vals):
+    """Return hyperopt misc vals as a json string, for use as a key."""
+    return json.dumps(
+        {
+            k: [x.item() if hasattr(x, "item") else x for x in v]
+            for k, v in vals.items()
+        },
+        sort_keys=True,
+    )
+
+
+def load_trials(store_location, input_name, solver):
+    """
+    Return a Trials() warm-started from the results in store_location.
+
+    Parameters
+    ----------
+    store_location : str
+        Full path to the sqlite trial store, written by store_trials.
+    input_name : str
+        The name of the input file the trials were run on.
+    solver : str
+        The name of the solution method the trials were run with.
+
+    Returns
+    -------
+    hyperopt.Trials : trials
+        Holds all the stored results for input_name and solver.
+
+    """
+    trials = Trials()
+    if not os.path.isfile(store_location):
+        return trials
+    with closing(sqlite3.connect(store_location, timeout=60)) as conn:
+        rows = conn.execute(
+            "SELECT vals, result FROM trials WHERE input_name = ? AND solver = ?",
+            (input_name, solver),
+        ).fetchall()
+    if len(rows) == 0:
+        return trials
+
+    tids = trials.new_trial_ids(len(rows))
+    specs, results, miscs = [], [], []
+    for tid, (vals, result) in zip(tids, rows):
+        vals = json.loads(vals)
+        specs.append(None)
+        results.append(pickle.loads(result))
+        miscs.append(
+            {
+                "tid": tid,
+                "cmd": ("domain_attachment", "FMinIter_Domain"),
+                "workdir": None,
+                "idxs": {k: [tid] * len(v) for k, v in vals.items()},
+                "vals": vals,
+            }
+        )
+    docs = trials.new_trial_docs(tids, specs, results, miscs)
+    for doc in docs:
+        doc["state"] = JOB_STATE_DONE
+    trials.insert_trial_docs(docs)
+    trials.refresh()
+    return trials
+
+
+def store_trials(store_location, input_name, solver, trials):
+    """
+    Add the finished trials to the sqlite trial store at store_location.
+
+    Parameter sets which are already stored for input_name and solver
+    are left alone. Solutions are not stored, to keep the store small.
+    """
+    rows = []
+    for doc in trials.trials:
+        result = doc["result"]
+        if result.get("status") != STATUS_OK:
+            continue
+        result = {k: v for k, v in result.items() if k != "solution"}
+        score = result.get("score", None)
+        rows.append(
+            (
+                input_name,
+                solver,
+                _vals_key(doc["misc"]["vals"]),
+                float(result["loss"]),
+                None if score is None else float(score),
+                pickle.dumps(result, pickle.HIGHEST_PROTOCOL),
+            )
+        )
+    with closing(sqlite3.connect(store_location, timeout=60)) as conn:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS trials (input_name TEXT, solver TEXT, "
+                "vals TEXT, loss REAL, score REAL, result BLOB, "
+                "UNIQUE (input_name, solver, vals))"
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO trials VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+
+def parser_modules(read_fn):
+    """
+    Return the modules read_fn depends on, for the load_input cache key.
+
+    This is the module read_fn is defined in, along with any module next to it
+    that read_fn uses a name from, such as common for read_rides or StreetGraph.
+    Hashing the whole of these modules means a change to a helper read_fn calls,
+    or to a class it builds and is pickled, gives a new cache entry.
+    """
+    module = inspect.getmodule(read_fn)
+    if module is None:
+        return []
+    modules = [module]
+    here = os.path.dirname(os.path.abspath(inspect.getfile(read_fn)))
+
+    codes = [read_fn.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+        for name in code.co_names:
+            obj = read_fn.__globals__.get(name)
+            if obj is None:
+                continue
+            used = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+            location = getattr(used, "__file__", None)
+            if location is None or used in modules:
+                continue
+            if os.path.dirname(os.path.abspath(location)) == here:
+                modules.append(used)
+    return modules
+
+
+def load_input(read_fn, input_location, version=0):
+    """
+    Return read_fn(input_location), using a cache of parsed inputs.
+
+    The parsed result is saved in input_files/.cache as a .npz file,
+    named by the hash of the input file, version and the source of the
+    modules read_fn depends on (see parser_modules).
+    Increase version when the parsed result changes in a way those modules
+    don't show, such as a change to a third party library.
+    Numpy arrays are saved as arrays and anything else is pickled.
+    """
+    with open(input_location, "rb") as f:
+        hasher = hashlib.sha1(f.read())
+    hasher.update(str(version).encode())
+    for module in parser_modules(read_fn):
+        try:
+            hasher.update(inspect.getsource(module).encode())
+        except (OSError, TypeError):
+            hasher.update(module.__name__.encode())
+    cache_dir = os.path.join(os.path.dirname(input_location), ".cache")
+    cache_loc = os.path.join(
+        cache_dir, os.path.basename(input_location) + "_" + hasher.hexdigest() + ".npz"
+    )
+
+    if os.path.isfile(cache_loc):
+        with np.load(cache_loc) as data:
+            arrays = [data["arr_{}".format(i)] for i in range(len(data.files) - 1)]
+            unpickler = pickle.Unpickler(io.BytesIO(data["info"].tobytes()))
+        unpickler.persistent_load = lambda i: arrays[i]
+        return unpickler.load()
+
+    info = read_fn(input_location)
+
+    # Pull the arrays out of info as it is pickled, to save them natively
+    arrays, array_ids = [], {}
+
+    def persistent_id(obj):
+        if type(obj) is np.ndarray and obj.dtype != object:
+            if id(obj) not in array_ids:
+                array_ids[id(obj)] = len(arrays)
+                arrays.append(obj)
+            return array_ids[id(obj)]
+        return None
+
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(info)
+
+    # Write to a temporary file first, in case another run is reading it
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_loc = cache_loc[:-4] + "_{}.npz".format(os.getpid())
+    np.savez(
+        temp_loc, *arrays, info=np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+    )
+    os.replace(temp_loc, cache_loc)
+    return info
+
+
 def add_params(l, name, values):
     """
     Add values to l with key=name.
@@ -84,6 +428,7 @@ def add_params(l, name, values):
 if __name__ == "__main__":
     """Can be run here to look at Trial data."""
     here = os.path.dirname(os.path.realpath(__file__))
-    dirname = "00-14-11"
+    # Either a timestamped output directory or the trial store "trials.db"
+    dirname = "trials.db"
     main_in_dir = os.path.join(here, "outputs", dirname)
     print_trial_info(main_in_dir)
@@ -11,7 +11,7 @@ try:
 except:
     pass
 
-from utils import save_object
+from utils import parallel_fmin, load_trials, store_trials
 from common import scorer
 from matheus import count_ingredients
 
@@ -132,7 +132,11 @@ def sean_solution(info, **kwargs):
 
     # Ignore this bit if not searching hyper_parameters!
     if kwargs.get("search", True):
-        trials = Trials()
+        # Warm-start from earlier runs on this input, kept next to the outputs
+        store_location = os.path.join(
+            os.path.dirname(kwargs["output_dir"]), "trials.db"
+        )
+        trials = load_trials(store_location, kwargs["input_name"], "sean_solution")
 
         # TODO Setup what values the args searching over can have
         space = hp.choice(
@@ -142,24 +146,21 @@ def sean_solution(info, **kwargs):
 
         # TODO If you know the best you do, pass loss_threshold=-best
         # Do hyper-param searching - possible pass per filename num_evals
-        best = fmin(
+        best = parallel_fmin(
             objective,
             space=space,
-            algo=tpe.suggest,
-            max_evals=kwargs.get("num_evals", 10),
+            max_evals=len(trials) + kwargs.get("num_evals", 10),
             trials=trials,
+            num_workers=kwargs.get("num_workers", None),
         )
 
         # Get the best hyper-params from fmin
         print("Best hyper-parameters found were:", best)
         args = space_eval(space, best)
 
-        # Save the trials to disk
+        # Add the trials to the store
         # These trials can be printed using print_trial_info in utils
-        out_name = os.path.join(
-            kwargs["output_dir"], "_" + kwargs["input_name"][:-2] + "pkl"
-        )
-        save_object(trials, out_name)
+        store_trials(store_location, kwargs["input_name"], "sean_solution", trials)
 
     else:
         # By default, this is just an empty dictionary.
@@ -22,6 +22,7 @@ import numpy as np
 from utils import line_to_data
 from utils import zip_dir
 from utils import add_params
+from utils import load_input
 from hyper_params import return_hyperparam_list
 
 # import your solution here
@@ -143,7 +144,7 @@ def run(input_location, output_location, method, **kwargs):
 
     """
     start_time = time()
-    info = read_file(input_location)
+    info = load_input(read_file, input_location)
     solution, score = method(info, **kwargs)
     write_file(output_location, solution)
     print("\tCompleted in {:.2f} seconds".format(time() - start_time))
@@ -9,6 +9,7 @@ from time import time
 from solution import print_solution, write_file, read_file
 from sean import sean_solution
 from common import scorer
+from utils import load_input
 
 
 def test_method(method, info, **kwargs):
@@ -60,7 +61,7 @@ if __name__ == "__main__":
 
     here = os.path.dirname(os.path.realpath(__file__))
     file_loc = os.path.join(here, "input_files", "a_example.in")
-    inp = read_file(file_loc)
+    inp = load_input(read_file, file_loc)
     from pprint import pprint
 
     pprint(inp)
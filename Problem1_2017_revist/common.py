@@ -0,0 +1,406 @@
+"""Please place things here which may be useful to everyone."""
+from heapq import heappush, heappop
+
+import numpy as np
+
+# One row per (video, endpoint) pair, as read_file gives request_info
+request_dtype = np.dtype(
+    [("video", np.int64), ("endpoint", np.int64), ("count", np.int64)])
+
+
+def aggregate_requests(requests):
+    """
+    Return the (R, 3) rows of (video, endpoint, count) as a request_dtype array.
+
+    Rows for the same video from the same endpoint are summed together,
+    and the result is ordered by video then endpoint.
+    """
+    requests = np.asarray(requests, dtype=np.int64).reshape(-1, 3)
+    order = np.lexsort((requests[:, 1], requests[:, 0]))
+    requests = requests[order]
+    new_pair = np.ones(len(requests), dtype=bool)
+    new_pair[1:] = np.any(requests[1:, :2] != requests[:-1, :2], axis=1)
+    starts = np.flatnonzero(new_pair)
+    table = np.empty(len(starts), dtype=request_dtype)
+    table["video"] = requests[starts, 0]
+    table["endpoint"] = requests[starts, 1]
+    table["count"] = np.add.reduceat(requests[:, 2], starts)
+    return table
+
+
+class VideoNetwork:
+    """
+    Array based view of the problem, built once from the read_file info.
+
+    The requests are the request_dtype table from read_file,
+    so they are ordered by video then endpoint with no repeated pairs.
+    The caches connected to endpoint e are
+    conn_cache[conn_ptr[e]:conn_ptr[e + 1]], closest first,
+    with the matching latencies in conn_latency.
+    """
+
+    def __init__(self, info):
+        V, E, R, C, X, video_sizes, endpoint_info, request_info = info
+        self.V, self.E, self.C, self.X = V, E, C, X
+        self.video_sizes = np.asarray(video_sizes, dtype=np.int64)
+        self.dc_latency = np.array([ei[0] for ei in endpoint_info], dtype=np.int64)
+
+        # Connections grouped by endpoint, sorted by latency
+        counts = np.array([len(ei[2]) for ei in endpoint_info], dtype=np.int64)
+        self.conn_ptr = np.zeros(E + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.conn_ptr[1:])
+        conns = np.array(
+            [c for ei in endpoint_info for c in ei[2]], dtype=np.int64
+        ).reshape(-1, 2)
+        conn_endpoint = np.repeat(np.arange(E), counts)
+        order = np.lexsort((conns[:, 1], conn_endpoint))
+        self.conn_cache = conns[order, 0]
+        self.conn_latency = conns[order, 1]
+
+        self.req_video = np.ascontiguousarray(request_info["video"])
+        self.req_endpoint = np.ascontiguousarray(request_info["endpoint"])
+        self.req_count = np.ascontiguousarray(request_info["count"])
+
+    def __repr__(self):
+        return "Network of {} videos, {} endpoints, {} caches and {} requests".format(
+            self.V, self.E, self.C, len(self.req_count)
+        )
+
+    def fill_caches(self, order):
+        """
+        Greedily place the videos for requests taken in the given order.
+
+        Each request is served from the closest connected cache that
+        already holds its video, or failing that the closest one with room.
+        Returns a C by V boolean array of which caches hold which videos.
+        """
+        V = self.V
+        sizes = self.video_sizes.tolist()
+        videos = self.req_video.tolist()
+        endpoints = self.req_endpoint.tolist()
+        ptr = self.conn_ptr.tolist()
+        conn_cache = self.conn_cache.tolist()
+        free = [self.X] * self.C
+        held = bytearray(self.C * V)
+
+        # Plain python lists are much quicker than numpy for single items
+        for r in order.tolist():
+            v = videos[r]
+            size = sizes[v]
+            e = endpoints[r]
+            for c in conn_cache[ptr[e] : ptr[e + 1]]:
+                if held[c * V + v]:
+                    break
+                if size <= free[c]:
+                    free[c] -= size
+                    held[c * V + v] = 1
+                    break
+
+        return np.frombuffer(held, dtype=bool).reshape(self.C, V)
+
+    def latency_table(self):
+        """
+        Return a C by E array of the latency from each cache to each endpoint.
+
+        Unconnected pairs get the highest data center latency,
+        so they never beat serving from the data center.
+        """
+        latency = np.full((self.C, self.E), np.max(self.dc_latency, initial=0))
+        conn_endpoint = np.repeat(np.arange(self.E), np.diff(self.conn_ptr))
+        latency[self.conn_cache, conn_endpoint] = self.conn_latency
+        return latency
+
+    def initial_gains(self, chunk_size=1 << 22):
+        """
+        Return the C by V latency saved by putting each video in each cache.
+
+        Worked out over chunks of the (request, connection) pairs,
+        to save building them all at once.
+        """
+        gains = np.zeros(self.C * self.V, dtype=np.int64)
+        num_conns = np.diff(self.conn_ptr)[self.req_endpoint]
+        ends = np.cumsum(num_conns)
+        start = 0
+        while start < len(ends):
+            first_pair = 0 if start == 0 else ends[start - 1]
+            stop = np.searchsorted(ends, first_pair + chunk_size, side="right")
+            stop = max(stop, start + 1)
+
+            # Expand each request into one entry per connected cache
+            reqs = np.repeat(np.arange(start, stop), num_conns[start:stop])
+            conn = self.conn_ptr[self.req_endpoint[reqs]] + (
+                np.arange(len(reqs)) - (ends[reqs] - num_conns[reqs] - first_pair))
+            saved = self.req_count[reqs] * np.maximum(
+                self.dc_latency[self.req_endpoint[reqs]] - self.conn_latency[conn], 0)
+            keys = self.conn_cache[conn] * self.V + self.req_video[reqs]
+            gains += np.bincount(
+                keys, weights=saved, minlength=self.C * self.V).astype(np.int64)
+            start = stop
+        return gains.reshape(self.C, self.V)
+
+    def lazy_fill(self):
+        """
+        Greedily place the video in the cache saving the most latency per MB.
+
+        The saving for each (cache, video) pair only shrinks as videos
+        are placed, so the savings are kept in a lazy priority queue.
+        A popped pair is only worked out again if its video has since been
+        placed in a cache sharing an endpoint with the popped cache.
+        Returns a C by V boolean array of which caches hold which videos.
+        """
+        V = self.V
+        sizes = self.video_sizes.tolist()
+        video_ptr = np.searchsorted(self.req_video, np.arange(V + 1)).tolist()
+        endpoints = np.split(self.req_endpoint, video_ptr[1:-1])
+        counts = np.split(self.req_count, video_ptr[1:-1])
+        latency = self.latency_table()
+        connected = latency < np.max(self.dc_latency, initial=0)
+        best = self.dc_latency[self.req_endpoint].copy()
+        free = [self.X] * self.C
+        held = bytearray(self.C * V)
+
+        # How often the saving of each pair has changed, memoryview for speed
+        changes = np.zeros((self.C, V), dtype=np.int32)
+        num_changes = memoryview(changes.ravel())
+
+        # Start from every useful pair, sorted by saving per MB
+        gains = self.initial_gains().ravel()
+        keys = np.flatnonzero(
+            (gains > 0) & (np.tile(self.video_sizes, self.C) <= self.X))
+        ratios = gains[keys] / np.tile(self.video_sizes, self.C)[keys]
+        order = np.argsort(-ratios, kind="stable")
+        keys, ratios = keys[order].tolist(), (-ratios[order]).tolist()
+        del gains, order
+
+        # Pairs worked out again wait in heap, the rest are taken in order
+        heap = []
+        i = 0
+        smallest, most_free = min(sizes, default=0), self.X
+        while (i < len(keys) or heap) and most_free >= smallest:
+            if heap and (i == len(keys) or heap[0][0] < ratios[i]):
+                _, key, seen = heappop(heap)
+            else:
+                key, seen = keys[i], 0
+                i += 1
+            c, v = divmod(key, V)
+            if sizes[v] > free[c] or held[key]:
+                continue
+
+            # Savings only change when the video is placed somewhere nearby
+            best_v = best[video_ptr[v] : video_ptr[v + 1]]
+            latency_v = latency[c][endpoints[v]]
+            if seen != num_changes[key]:
+                saved = np.maximum(best_v - latency_v, 0)
+                gain = int(np.dot(counts[v], saved))
+                if gain == 0:
+                    continue
+
+                # Still the best pair, so no need to queue it up again
+                ratio = -gain / sizes[v]
+                next_ratio = min(
+                    heap[0][0] if heap else 0, ratios[i] if i < len(keys) else 0)
+                if ratio > next_ratio:
+                    heappush(heap, (ratio, key, num_changes[key]))
+                    continue
+
+            held[key] = 1
+            free[c] -= sizes[v]
+            most_free = max(free)
+            improved = endpoints[v][latency_v < best_v]
+            np.minimum(best_v, latency_v, out=best_v)
+            changes[np.any(connected[:, improved], axis=1), v] += 1
+
+        return np.frombuffer(held, dtype=bool).reshape(self.C, V)
+
+    def best_latencies(self, held):
+        """Return the lowest latency each request can be served with."""
+        best = self.dc_latency[self.req_endpoint].copy()
+        todo = np.flatnonzero(self.conn_ptr[self.req_endpoint + 1] >
+                              self.conn_ptr[self.req_endpoint])
+        k = 0
+
+        # Caches are closest first, so the first one holding the video is best
+        while len(todo) > 0:
+            conn = self.conn_ptr[self.req_endpoint[todo]] + k
+            found = held[self.conn_cache[conn], self.req_video[todo]]
+            best[todo[found]] = self.conn_latency[conn[found]]
+            todo = todo[~found]
+            todo = todo[self.conn_ptr[self.req_endpoint[todo] + 1] >
+                        self.conn_ptr[self.req_endpoint[todo]] + k + 1]
+            k += 1
+        return best
+
+    def score(self, held):
+        """Return the score for the caches holding the videos in held."""
+        saved = self.req_count * (
+            self.dc_latency[self.req_endpoint] - self.best_latencies(held))
+        return int(np.floor(1000 * np.sum(saved) / np.sum(self.req_count)))
+
+    def solution(self, held):
+        """Return held in the output format, a list of [cache, videos...]."""
+        return [[c] + np.flatnonzero(row).tolist() for c, row in enumerate(held)]
+
+
+class CacheState:
+    """
+    Which caches hold which videos, with the score kept up to date.
+
+    For each request the best and second best serving latencies are kept,
+    along with the caches giving them (-1 for the data center).
+    Working out or making a change of one video in one cache then only
+    needs the requests for that video, and an endpoint's connections
+    are only scanned when the cache giving its second best loses the video.
+    """
+
+    def __init__(self, network, held):
+        self.network = network
+        self.held = np.array(held, dtype=bool)
+        self.latency = network.latency_table()
+        self.free = network.X - self.held.astype(np.int64) @ network.video_sizes
+        self.sizes = network.video_sizes.tolist()
+
+        # The requests for video v are video_ptr[v]:video_ptr[v + 1]
+        ptr = np.searchsorted(network.req_video, np.arange(network.V + 1))
+        self.video_reqs = [slice(a, b) for a, b in zip(ptr[:-1], ptr[1:])]
+
+        # Find the two closest caches holding the video for each request
+        R = len(network.req_count)
+        self.dc_latency = network.dc_latency[network.req_endpoint]
+        self.best = self.dc_latency.copy()
+        self.second = self.dc_latency.copy()
+        self.best_cache = np.full(R, -1, dtype=np.int64)
+        self.second_cache = np.full(R, -1, dtype=np.int64)
+        num_conns = np.diff(network.conn_ptr)[network.req_endpoint]
+        todo = np.flatnonzero(num_conns > 0)
+        k = 0
+        while len(todo) > 0:
+            conn = network.conn_ptr[network.req_endpoint[todo]] + k
+            cache = network.conn_cache[conn]
+            found = self.held[cache, network.req_video[todo]]
+            first = found & (self.best_cache[todo] == -1)
+            later = found & ~first
+            self.best[todo[first]] = network.conn_latency[conn[first]]
+            self.best_cache[todo[first]] = cache[first]
+            self.second[todo[later]] = network.conn_latency[conn[later]]
+            self.second_cache[todo[later]] = cache[later]
+            todo = todo[~later & (num_conns[todo] > k + 1)]
+            k += 1
+
+        self.saved = int(np.dot(network.req_count, self.dc_latency - self.best))
+
+    def score(self):
+        """Return the score of the current state."""
+        return int(np.floor(1000 * self.saved / np.sum(self.network.req_count)))
+
+    def add_delta(self, c, v):
+        """Return the change in latency saved if cache c gained video v."""
+        reqs = self.video_reqs[v]
+        latency = self.latency[c][self.network.req_endpoint[reqs]]
+        saved = np.maximum(self.best[reqs] - latency, 0)
+        return int(np.dot(self.network.req_count[reqs], saved))
+
+    def remove_delta(self, c, v):
+        """Return the change in latency saved if cache c lost video v."""
+        reqs = self.video_reqs[v]
+        lost = np.where(
+            self.best_cache[reqs] == c, self.second[reqs] - self.best[reqs], 0)
+        return -int(np.dot(self.network.req_count[reqs], lost))
+
+    def add(self, c, v):
+        """Put video v in cache c."""
+        reqs = self.video_reqs[v]
+        latency = self.latency[c][self.network.req_endpoint[reqs]]
+        best, second = self.best[reqs], self.second[reqs]
+        best_cache, second_cache = self.best_cache[reqs], self.second_cache[reqs]
+        self.saved += self.add_delta(c, v)
+
+        # Either the new best, pushing the old best down, or the new second
+        new_best = latency < best
+        new_second = ~new_best & (latency < second)
+        second[new_best] = best[new_best]
+        second_cache[new_best] = best_cache[new_best]
+        best[new_best] = latency[new_best]
+        best_cache[new_best] = c
+        second[new_second] = latency[new_second]
+        second_cache[new_second] = c
+
+        self.held[c, v] = True
+        self.free[c] -= self.sizes[v]
+
+    def remove(self, c, v):
+        """Take video v out of cache c."""
+        reqs = self.video_reqs[v]
+        best, second = self.best[reqs], self.second[reqs]
+        best_cache, second_cache = self.best_cache[reqs], self.second_cache[reqs]
+        self.saved += self.remove_delta(c, v)
+        self.held[c, v] = False
+        self.free[c] += self.sizes[v]
+
+        # The second best moves up, and a new second best is searched for
+        lost_best = best_cache == c
+        best[lost_best] = second[lost_best]
+        best_cache[lost_best] = second_cache[lost_best]
+        for i in np.flatnonzero(lost_best | (second_cache == c)):
+            second[i], second_cache[i] = self._find_second(
+                reqs.start + i, v, best_cache[i])
+
+    def _find_second(self, r, v, best_cache):
+        """Return the latency and cache serving request r, ignoring best_cache."""
+        network = self.network
+        e = network.req_endpoint[r]
+        conns = slice(network.conn_ptr[e], network.conn_ptr[e + 1])
+        caches = network.conn_cache[conns]
+        found = np.flatnonzero(self.held[caches, v] & (caches != best_cache))
+        if len(found) == 0:
+            return network.dc_latency[e], -1
+        return network.conn_latency[conns][found[0]], caches[found[0]]
+
+
+def local_search(network, held, num_moves):
+    """
+    Hill climb from held by adding videos, or swapping them in for others.
+
+    Each move picks a request, at random weighted by its count,
+    and one of the caches its endpoint connects to.
+    The video is added if it fits, otherwise it is swapped for the video
+    in that cache which loses the least from a small random sample.
+    Moves are only made if they improve the score.
+    Returns the new C by V boolean array of which caches hold which videos.
+    """
+    state = CacheState(network, held)
+    if len(network.req_count) == 0 or num_moves <= 0:
+        return state.held
+    probs = network.req_count / np.sum(network.req_count)
+    reqs = np.random.choice(len(probs), size=num_moves, p=probs)
+    picks = np.random.random_sample(num_moves)
+    sizes = state.sizes
+
+    for r, pick in zip(reqs.tolist(), picks.tolist()):
+        e = network.req_endpoint[r]
+        first, last = network.conn_ptr[e], network.conn_ptr[e + 1]
+        if first == last:
+            continue
+        c = network.conn_cache[first + int(pick * (last - first))]
+        v = network.req_video[r]
+        if state.held[c, v] or sizes[v] > network.X:
+            continue
+        gain = state.add_delta(c, v)
+        if gain <= 0:
+            continue
+        if sizes[v] <= state.free[c]:
+            state.add(c, v)
+            continue
+
+        # Only videos big enough to make room for v can be swapped out
+        others = np.flatnonzero(state.held[c])
+        others = others[network.video_sizes[others] >= sizes[v] - state.free[c]]
+        if len(others) == 0:
+            continue
+        others = others[np.random.randint(len(others), size=min(len(others), 4))]
+        losses = [state.remove_delta(c, u) for u in others.tolist()]
+        best = int(np.argmax(losses))
+        if gain + losses[best] > 0:
+            state.remove(c, others[best])
+            state.add(c, v)
+
+    return state.held
@@ -1,5 +1,5 @@
 def return_hyperparam_list():
-    args = {"latency": 1, "size": 0, "request": 1}
+    args = {"latency": 1, "size": 0, "request": 1, "lazy": True}
     best1 = args
     best2 = args
     best3 = args
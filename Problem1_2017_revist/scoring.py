@@ -1,126 +1,65 @@
+"""
+Score submissions the same way the judge does.
+
+Can be used from python with score_solution, or on files with
+python scoring.py INPUT_FILE SUBMISSION_FILE
+"""
+import sys
+
 import numpy as np
 
+from common import VideoNetwork
+
+
+def read_submission(submission_location):
+    """Return the submission as a list of [cache, videos...] lists."""
+    with open(submission_location, "r") as f:
+        N = int(f.readline())
+        return [[int(x) for x in f.readline().split()] for _ in range(N)]
+
+
+def solution_to_held(network, solution):
+    """
+    Return a C by V boolean array of which caches hold which videos.
+
+    Raises ValueError if the solution is not valid,
+    such as a cache being described twice or holding too much.
+    """
+    solution = [line for line in solution if len(line) > 0]
+    caches = np.array([line[0] for line in solution], dtype=np.int64)
+    counts = np.array([len(line) - 1 for line in solution], dtype=np.int64)
+    videos = np.array(
+        [v for line in solution for v in line[1:]], dtype=np.int64)
+    if np.any((caches < 0) | (caches >= network.C)):
+        raise ValueError("Solution uses a cache which doesn't exist")
+    if len(np.unique(caches)) != len(caches):
+        raise ValueError("Solution describes a cache more than once")
+    if np.any((videos < 0) | (videos >= network.V)):
+        raise ValueError("Solution uses a video which doesn't exist")
+
+    held = np.zeros((network.C, network.V), dtype=bool)
+    held[np.repeat(caches, counts), videos] = True
+    filled = held.astype(np.int64) @ network.video_sizes
+    if np.any(filled > network.X):
+        raise ValueError("Filled cache {} too much!".format(
+            np.flatnonzero(filled > network.X)[0]))
+    return held
+
+
+def score_solution(network, solution):
+    """Return the score of solution, a list of [cache, videos...] lists."""
+    return network.score(solution_to_held(network, solution))
+
+
+def score(input_location, submission_location):
+    """Return the score of the submission file for the input file."""
+    # Imported here as solution imports the solvers, which use this file
+    from solution import read_file
+    from utils import load_input
+
+    network = VideoNetwork(load_input(read_file, input_location))
+    return score_solution(network, read_submission(submission_location))
+
 
-class Endpoint(object):
-    def __init__(self, Ld, K):
-        self.Ld = int(Ld)
-        self.K = K
-        self.cs = []
-        self.Lcs = []
-
-    def add_c(self, c, Lc):
-        self.cs.append(int(c))
-        self.Lcs.append(int(Lc))
-
-    def getLcFromC(self, C):
-        return self.Lcs[self.cs.index(C)]
-
-    def getCs(self):
-        return self.cs
-
-    def getLd(self):
-        return self.Ld
-
-
-class Request(object):
-    def __init__(self, Rv, Re, Rn):
-        self.Rv = int(Rv)
-        self.Re = int(Re)
-        self.Rn = int(Rn)
-
-    def getValues(self):
-        return [self.Rv, self.Re, self.Rn]
-
-
-class CacheServer(object):
-    def __init__(self, id):
-        self.id = id
-        self.videos = []
-
-    def addVideo(self, v):
-        self.videos.append(int(v))
-
-    def getId(self):
-        return self.id
-
-    def getValues(self):
-        return self.videos
-
-
-def score(inputF, submissionF):
-    with open(inputF) as f:
-        content = f.readlines()
-
-    firstLine = content[0].split(" ")
-    V = int(firstLine[0])
-    E = int(firstLine[1])
-    R = int(firstLine[2])
-    C = int(firstLine[3])
-    X = int(firstLine[4])
-    S = content[1].split(" ")
-    line = 2
-    endPoints = []
-    for endpoint in range(0, E):
-        endPsummary = content[line].split(" ")
-        endP = Endpoint(int(endPsummary[0]), int(endPsummary[1]))
-        line = line + 1
-        for x in range(0, int(endPsummary[1])):
-            cacheS = content[line].split(" ")
-            endP.add_c(cacheS[0], cacheS[1])
-            line = line + 1
-        endPoints.append(endP)
-    requests = []
-    for req in range(0, R):
-        reqsummary = content[line].split(" ")
-        request = Request(int(reqsummary[0]), int(
-            reqsummary[1]), int(reqsummary[2]))
-        requests.append(request)
-        line = line + 1
-
-    with open(submissionF) as f:
-        content = f.readlines()
-    N = int(content[0])
-    cacheServers = []
-    line = 1
-    for x in range(0, N):
-        content[line] = content[line].strip("\n")
-        content[line] = content[line].strip(" ")
-        cacheSsummary = content[line].split(" ")
-        Cs = CacheServer(int(cacheSsummary[0]))
-        cacheSsummary = cacheSsummary[1:]
-        for y in cacheSsummary:
-            Cs.addVideo(int(y))
-        cacheServers.append(Cs)
-        line = line + 1
-    num = 0
-    den = 0
-
-    for each in requests:
-        firstReq = each.getValues()
-        firstVideo = int(firstReq[0])
-        firstendpoint = endPoints[firstReq[1]]
-        dataCenterLatency = firstendpoint.getLd()
-        cacheWithVideo = []
-        for cacheserver in cacheServers:
-            if (firstVideo in cacheserver.getValues()):
-                cacheWithVideo.append(cacheserver.getId())
-        latencies = []
-        latencies.append(dataCenterLatency)
-        cachesEndpoint = firstendpoint.getCs()
-        for cache in cachesEndpoint:
-            if (cache in cacheWithVideo):
-                latencies.append(firstendpoint.getLcFromC(cache))
-        minlat = min(latencies)
-        saved = dataCenterLatency - minlat
-        den = den + int(firstReq[2])
-        num = num + int(firstReq[2]) * saved
-
-    total = int(1000 * num / den)
-    return total
-
-
-listResults = []
-inp = r"C:\Users\seank\Repos\Hash_code\Problem1_2017_revist\input_files\me_at_the_zoo.in"
-out = r"C:\Users\seank\Repos\Hash_code\Problem1_2017_revist\outputs\02-06-06\me_at_the_zoo.out"
-listResults.append(score(inp, out))
-print("Score: ", sum(listResults))
+if __name__ == "__main__":
+    print("Score: ", score(sys.argv[1], sys.argv[2]))
@@ -10,12 +10,14 @@ import numpy as np
 from utils import line_to_data
 from utils import zip_dir
 from utils import add_params
+from utils import load_input
 from hyper_params import return_hyperparam_list
+from common import aggregate_requests
 
 # import your solution here
 from matheus import matheus_solution
 from ham import ham_solution
-from sean import sean_solution
+from sean import sean_solution, importance_solution
 
 
 def read_file(input_location):
@@ -32,10 +34,9 @@ def read_file(input_location):
                 c, Lc = line_to_data(f.readline(), np_array=False, dtype=int)
                 cache_info.append([c, Lc])
             endpoint_info.append([Ld, K, cache_info])
-        request_info = []
-        for i in range(R):
-            Rv, Re, Rn = line_to_data(f.readline(), np_array=False, dtype=int)
-            request_info.append([Rv, Re, Rn])
+        # The rest of the file is R rows of (video, endpoint, count)
+        requests = np.array(f.read().split()[:3 * R], dtype=np.int64)
+        request_info = aggregate_requests(requests.reshape(R, 3))
         info = (V, E, R, C, X, video_sizes, endpoint_info, request_info)
     return info
 
@@ -60,7 +61,7 @@ def print_solution(solution):
 def run(input_location, output_location, method, **kwargs):
     """Read the file, calculate solution, and write the results."""
     start_time = time()
-    info = read_file(input_location)
+    info = load_input(read_file, input_location)
     solution, score = method(info, **kwargs)
     write_file(output_location, solution)
     print("\tCompleted in {:.2f} seconds".format(time() - start_time))
@@ -129,6 +130,7 @@ def main(method, filenames, parameter_list, skip, seed):
 if __name__ == "__main__":
     """This is where things you should change are."""
     # Change the method here to the desired one
+    # importance_solution runs the C heuristic from Problem1_2017
     method = sean_solution
 
     # Decide here if you are doing any searching
@@ -37,7 +37,21 @@ def test_opt():
     print(objective(space_eval(space, best)))
 
 
+def test_scoring(input_name, output_dir):
+    """Score an output file written by solution.py against its input."""
+    import os
+    from scoring import score
+    here = os.path.dirname(os.path.realpath(__file__))
+    input_location = os.path.join(here, "input_files", input_name)
+    output_location = os.path.join(
+        here, "outputs", output_dir, input_name[:-3] + ".out")
+    start_time = time()
+    print("Scored {} in {} seconds".format(
+        score(input_location, output_location), time() - start_time))
+
+
 if __name__ == "__main__":
     # info = []
     # test_method(sean_solution, info)
     test_opt()
+    # test_scoring("kittens.in", "02-06-06")
@@ -0,0 +1,100 @@
+"""
+Python interface to the C importance heuristic in video_lib.c.
+
+The shared library is compiled with cc the first time it is needed,
+and again whenever video_lib.c is changed.
+"""
+import ctypes
+import os
+import subprocess
+
+import numpy as np
+
+here = os.path.dirname(os.path.realpath(__file__))
+source_location = os.path.join(here, "video_lib.c")
+library_location = os.path.join(here, "libvideo.so")
+_library = None
+
+
+def build(force=False):
+    """Compile video_lib.c to libvideo.so if needed, returning its path."""
+    if (
+        force
+        or not os.path.isfile(library_location)
+        or os.path.getmtime(library_location) < os.path.getmtime(source_location)
+    ):
+        # Compile to a temporary file first, in case another process loads it
+        compiler = os.environ.get("CC", "cc")
+        temp_location = library_location[:-3] + "_{}.so".format(os.getpid())
+        subprocess.run(
+            [compiler, "-O3", "-shared", "-fPIC", "-o", temp_location,
+             source_location, "-lm"],
+            check=True)
+        os.replace(temp_location, library_location)
+    return library_location
+
+
+def load_library():
+    """Return the C library, building and loading it the first time."""
+    global _library
+    if _library is None:
+        library = ctypes.CDLL(build())
+        ints = np.ctypeslib.ndpointer(dtype=np.int32, flags="C_CONTIGUOUS")
+        held = np.ctypeslib.ndpointer(dtype=np.uint8, flags="C_CONTIGUOUS")
+        library.solve.restype = ctypes.c_int
+        library.solve.argtypes = (
+            [ctypes.c_int] * 5 + [ints] * 6 + [ctypes.c_double] * 5 + [held])
+        _library = library
+    return _library
+
+
+def importance_arrays(info):
+    """
+    Return the read_file info as the int32 arrays the C code works on.
+
+    These are the video sizes, endpoint data center latencies,
+    the endpoint to cache connections in CSR form (pointers, caches,
+    latencies) and the requests as rows of (video, endpoint, number),
+    one row for each (video, endpoint) pair.
+    """
+    V, E, R, C, X, video_sizes, endpoint_info, request_info = info
+    video_sizes = np.ascontiguousarray(video_sizes, dtype=np.int32)
+    latency_d = np.array([ei[0] for ei in endpoint_info], dtype=np.int32)
+    conn_ptr = np.zeros(E + 1, dtype=np.int32)
+    np.cumsum([len(ei[2]) for ei in endpoint_info], out=conn_ptr[1:])
+    conns = np.array(
+        [c for ei in endpoint_info for c in ei[2]], dtype=np.int32).reshape(-1, 2)
+    requests = np.empty((len(request_info), 3), dtype=np.int32)
+    requests[:, 0] = request_info["video"]
+    requests[:, 1] = request_info["endpoint"]
+    requests[:, 2] = request_info["count"]
+    return (
+        video_sizes, latency_d, conn_ptr,
+        np.ascontiguousarray(conns[:, 0]), np.ascontiguousarray(conns[:, 1]),
+        requests)
+
+
+def importance_fill(info, alpha, beta, gam, zeta, eta, arrays=None):
+    """
+    Run the C importance heuristic on the read_file info.
+
+    A video's importance for a request is
+    exp(alpha / size) * log(beta * Ld) * log(gam * Rn),
+    which is given to each connected cache scaled by exp(zeta / Lc).
+    The most important videos are placed first, and once a video is placed
+    its importance to every other cache is multiplied by eta.
+    Pass arrays from importance_arrays to save converting info every call.
+    Returns a C by V boolean array of which caches hold which videos.
+    """
+    V, E, R, C, X = info[:5]
+    if arrays is None:
+        arrays = importance_arrays(info)
+    held = np.zeros((C, V), dtype=np.uint8)
+    err = load_library().solve(
+        V, E, len(arrays[-1]), C, X, *arrays,
+        alpha, beta, gam, zeta, eta, held)
+    if err == -2:
+        raise ValueError("eta must be at most 1, not {}".format(eta))
+    if err != 0:
+        raise MemoryError("Not enough memory for the C importance heuristic")
+    return held.view(bool)
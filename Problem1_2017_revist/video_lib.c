@@ -0,0 +1,254 @@
+/*
+ * Library version of the importance heuristic in Problem1_2017/video_mod.c
+ * Called from python through ctypes, see video_c.py
+ *
+ * Build with
+ * cc -O3 -shared -fPIC -o libvideo.so video_lib.c -lm
+ */
+#include <stdlib.h>
+#include <math.h>
+
+//Everything the heuristic needs, instead of globals
+typedef struct context {
+  int V, E, R, C, X;
+  const int *video_size;
+  const int *latency_d;
+  const int *conn_ptr;
+  const int *conn_cache;
+  const int *conn_latency;
+  const int *request;
+  double alpha, beta, gam, zeta, eta;
+  double *cache_score;
+} context;
+
+//compute answer
+static double importance(const context *ctx, int size, int ld, int rn) {
+  return exp(ctx->alpha * (1.0 / (double)size)) *
+         log(ctx->beta * ld) * log(ctx->gam * rn);
+}
+
+static double imp_cache(const context *ctx, double imp, int lc) {
+  return imp * exp(ctx->zeta * 1.0 / (double)lc);
+}
+
+static void compute_importance(context *ctx, int vid_id, int ep, int num_r) {
+  int i;
+  double orig_imp;
+  if(ctx->video_size[vid_id] > ctx->X) orig_imp = 0;
+  else orig_imp = importance(
+    ctx, ctx->video_size[vid_id], ctx->latency_d[ep], num_r);
+  for(i = ctx->conn_ptr[ep]; i < ctx->conn_ptr[ep + 1]; ++i) {
+    ctx->cache_score[(size_t)ctx->conn_cache[i] * ctx->V + vid_id] +=
+      imp_cache(ctx, orig_imp, ctx->conn_latency[i]);
+  }
+}
+
+static void find_answer(context *ctx) {
+  int i;
+  const int *request;
+  for(i = 0; i < ctx->R; ++i) {
+    request = ctx->request + 3 * (size_t)i;
+    compute_importance(ctx, request[0], request[1], request[2]);
+  }
+}
+
+/*
+ * Each cache keeps its videos in an indexed max-heap on cache_score,
+ * heap[pos[v]] == v, so a video whose score changes can be moved in
+ * O(log V) rather than found with a scan and bubbled along one at a time.
+ * The caches themselves are kept in an indexed max-heap on their best score.
+ */
+typedef struct heaps {
+  int *heap;
+  int *pos;
+  int *cache_heap;
+  int *cache_pos;
+  int *done;
+} heaps;
+
+//Score of video v in cache c, with ties going to the lower video
+static int video_before(const context *ctx, int c, int a, int b) {
+  double sa = ctx->cache_score[(size_t)c * ctx->V + a];
+  double sb = ctx->cache_score[(size_t)c * ctx->V + b];
+  return sa > sb || (sa == sb && a < b);
+}
+
+static void video_swap(const context *ctx, heaps *h, int c, int i, int j) {
+  int *heap = h->heap + (size_t)c * ctx->V;
+  int *pos = h->pos + (size_t)c * ctx->V;
+  int temp = heap[i];
+  heap[i] = heap[j];
+  heap[j] = temp;
+  pos[heap[i]] = i;
+  pos[heap[j]] = j;
+}
+
+//Move the video at position i down the heap of cache c until it is in place
+static void video_down(const context *ctx, heaps *h, int c, int i) {
+  int child;
+  int *heap = h->heap + (size_t)c * ctx->V;
+  while((child = 2 * i + 1) < ctx->V) {
+    if(child + 1 < ctx->V && video_before(ctx, c, heap[child + 1], heap[child]))
+      ++child;
+    if(!video_before(ctx, c, heap[child], heap[i])) break;
+    video_swap(ctx, h, c, i, child);
+    i = child;
+  }
+}
+
+//Restore the heap of cache c after the score at position i changed
+static void video_update(const context *ctx, heaps *h, int c, int i) {
+  int *heap = h->heap + (size_t)c * ctx->V;
+  while(i > 0 && video_before(ctx, c, heap[i], heap[(i - 1) / 2])) {
+    video_swap(ctx, h, c, i, (i - 1) / 2);
+    i = (i - 1) / 2;
+  }
+  video_down(ctx, h, c, i);
+}
+
+//The best score left in cache c, or -HUGE_VAL once it is done
+static double cache_key(const context *ctx, const heaps *h, int c) {
+  if(h->done[c]) return -HUGE_VAL;
+  return ctx->cache_score[(size_t)c * ctx->V + h->heap[(size_t)c * ctx->V]];
+}
+
+//Score of cache c against cache d, with ties going to the lower cache
+static int cache_before(const context *ctx, const heaps *h, int c, int d) {
+  double kc = cache_key(ctx, h, c), kd = cache_key(ctx, h, d);
+  return kc > kd || (kc == kd && c < d);
+}
+
+static void cache_swap(heaps *h, int i, int j) {
+  int temp = h->cache_heap[i];
+  h->cache_heap[i] = h->cache_heap[j];
+  h->cache_heap[j] = temp;
+  h->cache_pos[h->cache_heap[i]] = i;
+  h->cache_pos[h->cache_heap[j]] = j;
+}
+
+//Move the cache at position i down the heap of caches until it is in place
+static void cache_down(const context *ctx, heaps *h, int i) {
+  int child;
+  int *heap = h->cache_heap;
+  while((child = 2 * i + 1) < ctx->C) {
+    if(child + 1 < ctx->C && cache_before(ctx, h, heap[child + 1], heap[child]))
+      ++child;
+    if(!cache_before(ctx, h, heap[child], heap[i])) break;
+    cache_swap(h, i, child);
+    i = child;
+  }
+}
+
+//Restore the heap of caches after the best score of cache c changed
+static void cache_update(const context *ctx, heaps *h, int c) {
+  int i = h->cache_pos[c];
+  int *heap = h->cache_heap;
+  while(i > 0 && cache_before(ctx, h, heap[i], heap[(i - 1) / 2])) {
+    cache_swap(h, i, (i - 1) / 2);
+    i = (i - 1) / 2;
+  }
+  cache_down(ctx, h, i);
+}
+
+static int put_in_cache(context *ctx, unsigned char *held) {
+  int i, k, c, max, video;
+  int V = ctx->V, C = ctx->C;
+  size_t cell;
+  heaps h;
+  int *amount = calloc(C, sizeof(int));
+  h.heap = malloc((size_t)C * V * sizeof(int));
+  h.pos = malloc((size_t)C * V * sizeof(int));
+  h.cache_heap = malloc(C * sizeof(int));
+  h.cache_pos = malloc(C * sizeof(int));
+  h.done = calloc(C, sizeof(int));
+  if(amount == NULL || h.heap == NULL || h.pos == NULL ||
+     h.cache_heap == NULL || h.cache_pos == NULL || h.done == NULL) {
+    free(amount);
+    free(h.heap);
+    free(h.pos);
+    free(h.cache_heap);
+    free(h.cache_pos);
+    free(h.done);
+    return -1;
+  }
+
+  //Build the heaps, bottom up
+  for(c = 0; c < C; ++c) {
+    for(i = 0; i < V; ++i) {
+      h.heap[(size_t)c * V + i] = i;
+      h.pos[(size_t)c * V + i] = i;
+    }
+    for(i = V / 2 - 1; i >= 0; --i) video_down(ctx, &h, c, i);
+  }
+  for(c = 0; c < C; ++c) {
+    h.cache_heap[c] = c;
+    h.cache_pos[c] = c;
+  }
+  for(i = C / 2 - 1; i >= 0; --i) cache_down(ctx, &h, i);
+
+  //Take the cache with the best video still to place, until none are left
+  while(C > 0 && cache_key(ctx, &h, h.cache_heap[0]) > 0) {
+    max = h.cache_heap[0];
+    video = h.heap[(size_t)max * V];
+    ctx->cache_score[(size_t)max * V + video] = 0;
+    video_update(ctx, &h, max, 0);
+    if(amount[max] + ctx->video_size[video] <= ctx->X) {
+      amount[max] += ctx->video_size[video];
+      if(amount[max] == ctx->X) h.done[max] = 1;
+      held[(size_t)max * V + video] = 1;
+      cache_update(ctx, &h, max);
+
+      //The video is now worth less to every other cache
+      for(k = 0; k < C; ++k) {
+        if(!h.done[k] && k != max) {
+          cell = (size_t)k * V + video;
+          ctx->cache_score[cell] *= ctx->eta;
+          video_update(ctx, &h, k, h.pos[cell]);
+          cache_update(ctx, &h, k);
+        }
+      }
+    }
+    else {
+      cache_update(ctx, &h, max);
+    }
+  }
+
+  free(amount);
+  free(h.heap);
+  free(h.pos);
+  free(h.cache_heap);
+  free(h.cache_pos);
+  free(h.done);
+  return 0;
+}
+
+/*
+ * Fill held, a C by V array, with which caches should hold which videos.
+ * The endpoint to cache connections are in CSR form, so endpoint e connects
+ * to conn_cache[conn_ptr[e]:conn_ptr[e + 1]], and requests are R rows of
+ * (video, endpoint, number of requests).
+ * Returns 0 on success, -1 if memory runs out and -2 if eta is above 1.
+ */
+int solve(int V, int E, int R, int C, int X,
+          const int *video_size, const int *latency_d,
+          const int *conn_ptr, const int *conn_cache, const int *conn_latency,
+          const int *request,
+          double alpha, double beta, double gam, double zeta, double eta,
+          unsigned char *held) {
+  int i, err;
+  context ctx = {
+    V, E, R, C, X, video_size, latency_d, conn_ptr, conn_cache, conn_latency,
+    request, alpha, beta, gam, zeta, eta, NULL
+  };
+
+  //Can't increase weight of videos if already appeared
+  if(eta > 1) return -2;
+  ctx.cache_score = calloc((size_t)C * V, sizeof(double));
+  if(ctx.cache_score == NULL) return -1;
+  for(i = 0; i < C * V; ++i) held[i] = 0;
+  find_answer(&ctx);
+  err = put_in_cache(&ctx, held);
+
+  free(ctx.cache_score);
+  return err;
+}
@@ -0,0 +1,133 @@
+"""Please place things here which may be useful to everyone."""
+import math
+
+import numpy as np
+
+# A ride goes from start to end, (row, col) pairs, and scores if it finishes
+# by latest. It gets the bonus if it starts at earliest.
+# length is the distance from start to end, worked out when it is read.
+ride_dtype = np.dtype([
+    ("start", np.int32, (2,)), ("end", np.int32, (2,)),
+    ("earliest", np.int32), ("latest", np.int32),
+    ("id", np.int32), ("length", np.int32)])
+
+
+def read_rides(f, N):
+    """
+    Return the next N rides in the open file f as an array of ride_dtype.
+
+    The rides are read in one go, and each is given its line number as id.
+    """
+    values = np.array(f.read().split()[:6 * N], dtype=np.int32).reshape(N, 6)
+    rides = np.zeros(N, dtype=ride_dtype)
+    rides["start"] = values[:, 0:2]
+    rides["end"] = values[:, 2:4]
+    rides["earliest"] = values[:, 4]
+    rides["latest"] = values[:, 5]
+    rides["id"] = np.arange(N)
+    rides["length"] = np.abs(values[:, 0:2] - values[:, 2:4]).sum(axis=1)
+    return rides
+
+
+class TaxiIndex:
+    """
+    Grid of where the taxis are and when they are free.
+
+    The city is split into square cells, about one for each taxi,
+    and each cell keeps its taxis and the earliest time any of them is free.
+    A ride can then look at the cells around its start, nearest first,
+    and skip any cell from which no taxi could get there in time.
+    """
+
+    def __init__(self, R, C, F):
+        self.cell_size = max(1, math.ceil(math.sqrt(R * C / max(F, 1))))
+        self.num_rows = max(1, -(-R // self.cell_size))
+        self.num_cols = max(1, -(-C // self.cell_size))
+        self.free = [0] * F
+        self.cell = [(0, 0)] * F
+        self.cell_taxis = {(0, 0): list(range(F))} if F > 0 else {}
+        self.cell_free = {(0, 0): 0} if F > 0 else {}
+        self._rings = {}
+
+    def _cell_of(self, row, col):
+        i = min(max(int(row) // self.cell_size, 0), self.num_rows - 1)
+        j = min(max(int(col) // self.cell_size, 0), self.num_cols - 1)
+        return i, j
+
+    def _update_free(self, cell):
+        taxis = self.cell_taxis[cell]
+        if len(taxis) == 0:
+            del self.cell_taxis[cell]
+            del self.cell_free[cell]
+        else:
+            self.cell_free[cell] = min(self.free[t] for t in taxis)
+
+    def move(self, taxi, row, col, free):
+        """Record that taxi will be at (row, col) and free at time free."""
+        self.free[taxi] = free
+        old_cell, new_cell = self.cell[taxi], self._cell_of(row, col)
+        if old_cell != new_cell:
+            self.cell_taxis[old_cell].remove(taxi)
+            self._update_free(old_cell)
+            self.cell_taxis.setdefault(new_cell, []).append(taxi)
+            self.cell[taxi] = new_cell
+        self._update_free(new_cell)
+
+    def nearby(self, row, col, deadline):
+        """
+        Yield (lower_bound, soonest, taxis) for cells around (row, col).
+
+        The cells go outwards a ring at a time, and lower_bound is the
+        least distance from (row, col) to any cell in the ring, so it never
+        goes down. soonest is the earliest any taxi in the cell could be at
+        (row, col), and only cells where that is at most deadline are given.
+        The taxis are not checked one by one, so not all of them can make it.
+        Stops once no taxi further out could make it.
+        """
+        ci, cj = self._cell_of(row, col)
+        max_ring = max(
+            ci, self.num_rows - 1 - ci, cj, self.num_cols - 1 - cj)
+        earliest = min(self.cell_free.values(), default=deadline + 1)
+        for k in range(max_ring + 1):
+            lower_bound = 0 if k == 0 else (k - 1) * self.cell_size + 1
+            if lower_bound + earliest > deadline:
+                return
+            for cell, top, bottom, left, right in self._ring_cells(ci, cj, k):
+                cell_free = self.cell_free.get(cell)
+                if cell_free is None:
+                    continue
+                soonest = cell_free + (
+                    top - row if row < top else
+                    row - bottom if row > bottom else 0) + (
+                    left - col if col < left else
+                    col - right if col > right else 0)
+                if soonest <= deadline:
+                    yield lower_bound, soonest, self.cell_taxis[cell]
+
+    def _ring_cells(self, ci, cj, k):
+        """
+        Return the cells in the grid k cells away from (ci, cj).
+
+        Each is given with the first and last rows and columns it covers.
+        """
+        key = (ci, cj, k)
+        if key not in self._rings:
+            size = self.cell_size
+            if k == 0:
+                cells = [(ci, cj)]
+            else:
+                cells = []
+                lo, hi = max(cj - k, 0), min(cj + k, self.num_cols - 1)
+                for i in (ci - k, ci + k):
+                    if 0 <= i < self.num_rows:
+                        cells.extend((i, j) for j in range(lo, hi + 1))
+                lo = max(ci - k + 1, 0)
+                hi = min(ci + k - 1, self.num_rows - 1)
+                for j in (cj - k, cj + k):
+                    if 0 <= j < self.num_cols:
+                        cells.extend((i, j) for i in range(lo, hi + 1))
+            self._rings[key] = [
+                (cell, cell[0] * size, (cell[0] + 1) * size - 1,
+                 cell[1] * size, (cell[1] + 1) * size - 1)
+                for cell in cells]
+        return self._rings[key]
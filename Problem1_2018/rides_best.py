@@ -2,6 +2,8 @@ from __future__ import print_function
 import sys
 import numpy as np
 
+from common import TaxiIndex, read_rides
+
 
 # SEAN MARTIN
 # Stefano
@@ -25,12 +27,8 @@ def read_file(filename):
         rows, columns, num_vehicles, num_rides, bonus, total_time = [
             int(n) for n in line.split()]
 
-        # Need to change
-        # Read num_rides lines and store in a num_rides * 6 array
-        rides = np.zeros([num_rides, 6], dtype=int)
-        for i in range(num_rides):
-            line = f.readline()
-            rides[i] = np.fromstring(line, dtype=int, sep=" ")
+        # Read all num_rides lines at once, see common.ride_dtype
+        rides = read_rides(f, num_rides)
 
     # error check
     print(rides)
@@ -55,15 +53,14 @@ def distance(a, b, x, y):
 
 def add_ride(index, ride, cars, car_rides):
     # Add the index
-    car_rides[index].append(ride[6])
-    cars[index][0] = ride[2]
-    cars[index][1] = ride[3]
-    distance_from_start = distance(
-        cars[index][0], cars[index][1], ride[0], ride[1])
+    car_rides[index].append(ride["id"])
+    cars[index][0], cars[index][1] = ride["end"]
+    a, b = ride["start"]
+    distance_from_start = distance(cars[index][0], cars[index][1], a, b)
     cars[index][2] += distance_from_start
-    if(cars[index][2] < ride[4]):
-        cars[index][2] = ride[4]
-    cars[index][2] += distance(ride[0], ride[1], ride[2], ride[3])
+    if(cars[index][2] < ride["earliest"]):
+        cars[index][2] = ride["earliest"]
+    cars[index][2] += ride["length"]
 
 
 def main():
@@ -78,40 +75,47 @@ def main():
         # List of empty lists
         result = [[] for i in range(num_vehicles)]
 
-        # Add index as a column
-        indices = np.array([x for x in range(num_rides)]).reshape(num_rides, 1)
-        rides = np.concatenate((rides, indices), axis=1)
-        sorted_rides = rides[rides[:, 4].argsort()]
+        sorted_rides = rides[rides["earliest"].argsort()]
         rides = sorted_rides
         print(rides)
         # car consists of the following
         # 0 current_row, 1 current_col, 2 current_time, 3 ride_flag
 
-        # ride consists of the following
-        # 0 start_row, 1 start_col, 2 end_row, 3 end_col, 4 start_time, 5 latest_time, 6 ID
+        # ride is of common.ride_dtype, with fields
+        # start, end, earliest, latest, id and length
+        index = TaxiIndex(rows, columns, num_vehicles)
         for ride in rides:
+            a, b = ride["start"]
             car = cars[0]
-            distance_from_start = distance(car[0], car[1], ride[0], ride[1])
+            distance_from_start = distance(car[0], car[1], a, b)
             best_index = 0
             best_distance = distance_from_start + car[2]
 
-            for i in range(num_vehicles):
-                car = cars[i]
-                distance_from_start = distance(
-                    car[0], car[1], ride[0], ride[1])
-                start_end_distance = distance(
-                    ride[0], ride[1], ride[2], ride[3])
-                starts_in_time = False
-                arrives_in_time = False
-                if distance_from_start + car[2] <= ride[4]:
-                    starts_in_time = True
-                if distance_from_start + car[2] + start_end_distance <= ride[5]:
-                    arrives_in_time = True
-
-                if arrives_in_time and distance_from_start + car[2] < best_distance:
-                    best_distance = distance_from_start + car[2]
-                    best_index = i
+            # Only look at the cars near enough to get there in time,
+            # nearest first, and stop once the rest are too far to be better
+            ride_length = ride["length"]
+            for lower_bound, soonest, nearby in index.nearby(
+                    a, b, min(ride["latest"] - ride_length, best_distance)):
+                if lower_bound > best_distance:
+                    break
+                if soonest > best_distance:
+                    continue
+                for i in nearby:
+                    car = cars[i]
+                    distance_from_start = distance(car[0], car[1], a, b)
+                    arrives_in_time = (
+                        distance_from_start + car[2] + ride_length <=
+                        ride["latest"])
+                    # Ties go to the lowest numbered car, as when going in order
+                    if arrives_in_time and (
+                            distance_from_start + car[2] < best_distance or
+                            (distance_from_start + car[2] == best_distance and
+                             0 < i < best_index)):
+                        best_distance = distance_from_start + car[2]
+                        best_index = i
             add_ride(best_index, ride, cars, result)
+            index.move(best_index, cars[best_index][0],
+                       cars[best_index][1], cars[best_index][2])
 
         outfile = filename[:-2] + "out"
         write_file(outfile, result)
@@ -6,8 +6,12 @@ Created on Thu Mar  1 19:25:42 2018
 """
 
 from __future__ import print_function
+from heapq import heapify, heappop, heappush
+
 import numpy as np
 
+from common import read_rides
+
 #SEAN MARTIN
 #Stefano
 #Given a list of pre-booked rides in a city and a fleet of self-driving vehicles, assign the rides to vehicles, so
@@ -29,12 +33,8 @@ def read_file(filename):
         #Read the first line
         rows, columns, num_vehicles, num_rides, bonus, total_time = [int(n) for n in line.split()]
 
-        #Need to change
-        #Read num_rides lines and store in a num_rides * 6 array
-        rides = np.zeros( [num_rides, 6], dtype = int )
-        for i in range(num_rides):
-          line = f.readline()
-          rides[i] = np.fromstring ( line, dtype=int, sep= " ")
+        #Read all num_rides lines at once, see common.ride_dtype
+        rides = read_rides(f, num_rides)
 
     return rows, columns, num_vehicles, num_rides, bonus, total_time, rides
 
@@ -53,15 +53,40 @@ def distance (a, b, x, y ):
 
 def add_ride(index, ride, cars, car_rides):
    #Add the index
-   car_rides[index].append(ride[6])
-   cars[index][0] = ride[2]
-   cars[index][1] = ride[3]
-   distance_from_start = distance(cars[index][0], cars[index][1], ride[0], ride[1])
+   car_rides[index].append(ride["id"])
+   cars[index][0], cars[index][1] = ride["end"]
+   a, b = ride["start"]
+   distance_from_start = distance(cars[index][0], cars[index][1], a, b)
    cars[index][2] += distance_from_start
-   if(cars[index][2] < ride[4]):
-       cars[index][2] = ride[4]
-   cars[index][2] += distance(ride[0], ride[1], ride[2], ride[3])
+   if(cars[index][2] < ride["earliest"]):
+       cars[index][2] = ride["earliest"]
+   cars[index][2] += ride["length"]
     
+def ride_scores(cars, rides, bonus,
+                ride_distance_weight, start_distance_weight):
+    """
+    Return the score of each ride against each car, as a rides by cars array.
+
+    A car which can't finish a ride in time scores 0 for it.
+    """
+    # Positions and times are whole numbers, and int32 is quicker
+    cars = cars[:, :3].astype(np.int32)
+    ride_distances = rides["length"][:, None]
+    distance_from_start = np.abs(cars[:, 0] - rides["start"][:, 0:1])
+    distance_from_start += np.abs(cars[:, 1] - rides["start"][:, 1:2])
+    arrive = distance_from_start + cars[:, 2]
+    on_time = arrive <= rides["earliest"][:, None]
+    score = ride_distance_weight * ride_distances
+    if start_distance_weight == 0:
+        score = np.where(on_time, score + bonus, score)
+    else:
+        score = score - start_distance_weight * distance_from_start
+        score += np.where(on_time, bonus, 0)
+    arrive += ride_distances
+    score[arrive >= rides["latest"][:, None]] = 0
+    return score
+
+
 def main():
   	#change the filename here
     #filenames = ["a_example.in"]
@@ -75,61 +100,88 @@ def main():
         # List of empty lists
         result = [[] for i in range(num_vehicles)]
     
-        # Add index as a column
-        indices = np.array([x for x in range(num_rides)]).reshape(num_rides, 1)
-        rides = np.concatenate((rides, indices), axis=1)
-        sorted_rides = rides[rides[:, 4].argsort()]
+        sorted_rides = rides[rides["earliest"].argsort()]
         rides = sorted_rides
         
          # car consists of the following
         # 0 current_row, 1 current_col, 2 current_time, 3 ride_flag
 
-        # ride consists of the following
-        # 0 start_row, 1 start_col, 2 end_row, 3 end_col, 4 start_time, 5 latest_time, 6 ID
+        # ride is of common.ride_dtype, with fields
+        # start, end, earliest, latest, id and length
         
         ride_distance_weight = 1
         start_distance_weight = 0.0
-        done = False
+
+        def scores(cars_to_score, which_rides):
+            return ride_scores(
+                cars_to_score, rides[which_rides],
+                bonus, ride_distance_weight, start_distance_weight)
+
+        # Cars which haven't moved are all the same, so only the first of
+        # them can be the best car for a ride, along with any that have moved
+        moved = np.zeros(num_vehicles, dtype=bool)
+        candidates = np.arange(min(num_vehicles, 1))
+
+        # The best car for each ride, the first if there is a tie,
+        # and a heap of the rides by best score then by order in rides.
+        # A heap entry is out of date if the ride's score has changed since,
+        # which is marked by changing its version.
+        all_rides = np.arange(num_rides)
+        score = scores(cars[candidates], all_rides)
+        best_index = candidates[np.argmax(score, axis=1)]
+        best_score = score.max(axis=1)
+        left = np.ones(num_rides, dtype=bool)
+        version = np.zeros(num_rides, dtype=int)
+        heap = [(-float(best_score[j]), j, 0)
+                for j in np.flatnonzero(best_score > 0).tolist()]
+        heapify(heap)
+
         count = 0
-        while(not done):
-            done = True
-            (best_over_score, best_over_index, best_ride_index) = (0, 0, 0)
-            j = 0
-            for k in range(rides.shape[0]):
-                ride = rides[j]
-                ride_distance = distance(ride[0], ride[1], ride[2], ride[3])
-                (best_score, best_index) = (0, 0)
-                for i in range(num_vehicles):
-                    car = cars[i]
-                    distance_from_start = distance(car[0], car[1], ride[0], ride[1])
-                    
-                    if(car[2] + distance_from_start + ride_distance >= ride[5]):
-                        score = 0
-                    else:
-                        score = ride_distance_weight * ride_distance
-                        score -= start_distance_weight * distance_from_start
-                        if(car[2] + distance_from_start <= ride[4]):
-                            score += bonus
-                        if (score > best_score):
-                            best_score = score
-                            best_index = i
-                if(best_score > best_over_score):
-                    best_over_score = best_score
-                    best_over_index = best_index
-                    best_ride_index = j
-                j = j + 1
+        while len(heap) > 0:
+            _, j, ride_version = heappop(heap)
+            if not left[j] or ride_version != version[j]:
+                continue
+
             #get the max index and add to vehicle
-            if(best_over_score > 0):
-                done = False
-                add_ride(best_over_index, rides[best_ride_index], cars, result)
-                rides = np.delete(rides, best_ride_index, 0)
-                #print(rides)
-            print(count)
+            car = best_index[j]
+            add_ride(car, rides[j], cars, result)
+            left[j] = False
             count = count + 1
-            if(count > num_rides):
-                print("reached ride limit")
-                done = True
-        
+            if not moved[car]:
+                moved[car] = True
+                candidates = np.flatnonzero(moved)
+                if not moved.all():
+                    candidates = np.union1d(candidates, np.argmin(moved))
+
+            # Only this car has changed, so see where it is now the best
+            car_score = ride_scores(
+                cars[car:car + 1], rides, bonus,
+                ride_distance_weight, start_distance_weight)[:, 0]
+            was_best = left & (best_index == car)
+            beaten = left & ~was_best & (car_score > 0) & (
+                (car_score > best_score) |
+                ((car_score == best_score) & (car < best_index)))
+            still_best = was_best & (car_score >= best_score)
+            changed = (beaten | still_best) & (car_score > best_score)
+            best_index[beaten] = car
+            best_score[changed] = car_score[changed]
+            changed = np.flatnonzero(changed)
+
+            # And look at every car again where it has got worse
+            worse = np.flatnonzero(was_best & ~still_best)
+            if len(worse) > 0:
+                score = scores(cars[candidates], worse)
+                best_index[worse] = candidates[np.argmax(score, axis=1)]
+                new_score = score.max(axis=1)
+                changed = np.concatenate(
+                    (changed, worse[new_score != best_score[worse]]))
+                best_score[worse] = new_score
+            for k in changed.tolist():
+                version[k] += 1
+                if best_score[k] > 0:
+                    heappush(heap, (-float(best_score[k]), k, int(version[k])))
+        print(count, "rides given out")
+
         outfile = filename + "out"          
         write_file(outfile, result)
         print(outfile + " completed")
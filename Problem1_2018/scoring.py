@@ -1,157 +1,92 @@
-import math
-
-
-class Ride(object):
-    def __init__(self, startR, startC, finishR, finishC, earliestStart, latestFinish):
-        self.startR = startR
-        self.startC = startC
-        self.finishR = finishR
-        self.finishC = finishC
-        self.earliestStart = earliestStart
-        self.latestFinish = latestFinish
-
-
-class Car(object):
-    def __init__(self, id, row=None, col=None):
-        self.id = id
-        self.row = row
-        self.col = col
-        self.actions = []
-        self.moving = 0
-        self.actualAction = 0
-        self.rewardToTake = False
-        self.eventualReward = 0
-        self.startRide = 0
-
-    def setRoute(self, listOfdestinations):
-        self.actions = listOfdestinations
-
-    def estimateTime(self, destRow, destCol):
-        height = math.fabs(destRow - self.row)
-        width = math.fabs(destCol - self.col)
-        # print("distance "+str(height+width))
-        return height + width
-
-    def takeAction(self):
-        self.moving = self.moving - 1
-        if self.moving <= 0:
-            if self.rewardToTake:
-                table.addScore(
-                    self.actions[self.actualAction], self.startRide, self.eventualReward)
-                self.rewardToTake = False
-                self.eventualReward = 0
-                self.actualAction = self.actualAction + 1
-
-            if self.actualAction < len(self.actions):
-
-                ride = Rides[self.actions[self.actualAction]]
-                if (self.row == ride.startR) & (self.col == ride.startC):
-                    if table.time >= ride.earliestStart:
-                        self.moving = self.estimateTime(
-                            ride.finishR, ride.finishC)
-                        self.eventualReward = self.estimateTime(
-                            ride.finishR, ride.finishC)
-                        self.startRide = table.time
-                        self.row = ride.finishR
-                        self.col = ride.finishC
-                        self.rewardToTake = True
-                    else:
-                        self.moving = ride.earliestStart - table.time
-                else:
-                    self.moving = self.estimateTime(ride.startR, ride.startC)
-                    self.row = ride.startR
-                    self.col = ride.startC
-
-
-class Ticker(object):
-    def __init__(self):
-        self.T = 0
-        self.score = 0
-        self.time = 0
-
-    def setT(self, T):
-        self.T = T
-
-    def next(self):
-        self.time = self.time + 1
-
-    def addScore(self, rideId, startTime, timeToTravel):
-        ride = Rides[rideId]
-        bonus = 0
-        if ride.earliestStart == startTime:
-            bonus = B
-        if startTime + timeToTravel <= ride.latestFinish:
-            self.score = self.score + bonus + timeToTravel
-
-    def getScore(self):
-        return self.score
-
-
-class Manager(object):
-    def __init__(self, T):
-        self.T = T
-
-    def start(self):
-        for x in range(self.T):
-            global R, C, F, Cars, N, B, T, Rides
-            # print("turn: ", x)
-            for car in Cars:
-                car.takeAction()
-            table.next()
-
-
-class JudgeSystem(object):
-    def __init__(self, inputF, submissionF):
-        global table
-        table = Ticker()
-        self.score(inputF, submissionF)
-
-    def score(self, inputF, submissionF):
-        with open(inputF) as f:
-            content = f.readlines()
-            line = 0
-            nLine = content[line].split(" ")
-            global R, C, F, Cars, N, B, T, Rides
-            R = int(nLine[0])
-            C = int(nLine[1])
-            F = int(nLine[2])
-            global Cars
-            Cars = []
-            for i in range(F):
-                car = Car(i, 0, 0)
-                Cars.append(car)
-            N = int(nLine[3])
-            B = int(nLine[4])
-            T = int(nLine[5])
-            global Rides
-            Rides = []
-            for x in range(N):
-                line = line + 1
-                nLine = content[line].split(" ")
-                rid = Ride(int(nLine[0]), int(nLine[1]), int(
-                    nLine[2]), int(nLine[3]), int(nLine[4]), int(nLine[5]))
-                Rides.append(rid)
-        with open(submissionF) as f:
-            content = f.readlines()
-            line = 0
-            for i in range(F):
-                nLine = content[line].split(" ")
-                numRides = int(nLine[0])
-                ridesToAdd = []
-                for rideCar in range(1, numRides + 1):
-                    ridesToAdd.append(int(nLine[rideCar]))
-                Cars[i].setRoute(ridesToAdd)
-                line = line + 1
-            manager = Manager(T)
-            manager.start()
-            self.score = table.getScore()
-
-
-filenames = ["a_example.out", "b_should_be_easy.out",
-             "c_no_hurry.out", "d_metropolis.out", "e_high_bonus.out"]
-total = 0
-for filename in filenames:
-    j = JudgeSystem(filename[:-3] + "in", filename)
-    print("{} Score: {}".format(filename[:-4], j.score))
-    total += j.score
-print("Total:", total)
+"""
+Score submissions the same way the judge does.
+
+Rather than stepping every car through all T ticks, each car's rides are
+followed once, working out when it gets to each start, when the ride
+starts and when it finishes.
+Can be used from python with score_solution, or on files with
+python scoring.py INPUT_FILE SUBMISSION_FILE
+"""
+import sys
+
+from common import read_rides
+
+
+def read_input(input_location):
+    """
+    Return (R, C, F, N, B, T, rides) from the input_location.
+
+    rides is an array of the N rides, of common.ride_dtype.
+    """
+    with open(input_location, "r") as f:
+        R, C, F, N, B, T = (int(x) for x in f.readline().split())
+        rides = read_rides(f, N)
+    return R, C, F, N, B, T, rides
+
+
+def read_submission(submission_location, F):
+    """Return the list of rides taken by each of the F cars."""
+    with open(submission_location, "r") as f:
+        lines = f.readlines()
+    solution = []
+    for i in range(F):
+        values = lines[i].split() if i < len(lines) else ["0"]
+        solution.append([int(x) for x in values[1:int(values[0]) + 1]])
+    return solution
+
+
+def score_solution(info, solution):
+    """
+    Return the score of solution, a list of ride numbers for each car.
+
+    info is as from read_file or read_input, with its last element the
+    rides, of common.ride_dtype, in the order they were read.
+    """
+    B, T = int(info[4]), int(info[5])
+    rides = info[-1]
+    starts, ends = rides["start"].tolist(), rides["end"].tolist()
+    earliest, latest = rides["earliest"].tolist(), rides["latest"].tolist()
+    lengths = rides["length"].tolist()
+    total = 0
+    for car_rides in solution:
+        row, col, time = 0, 0, 0
+        for ride in car_rides:
+            ride = int(ride)
+            a, b = starts[ride]
+            time = max(time + abs(row - a) + abs(col - b), earliest[ride])
+            length = lengths[ride]
+
+            # A ride is only scored on a tick before T,
+            # and the judge takes a tick to finish a ride of length 0
+            finish = time + max(length, 1)
+            if finish >= T:
+                break
+            if time + length <= latest[ride]:
+                total += length + (B if time == earliest[ride] else 0)
+            (row, col), time = ends[ride], finish
+    return total
+
+
+def score(input_location, submission_location):
+    """Return the score of the submission file for the input file."""
+    info = read_input(input_location)
+    return score_solution(
+        info, read_submission(submission_location, info[2]))
+
+
+def main():
+    filenames = ["a_example.out", "b_should_be_easy.out",
+                 "c_no_hurry.out", "d_metropolis.out", "e_high_bonus.out"]
+    total = 0
+    for filename in filenames:
+        file_score = score(filename[:-3] + "in", filename)
+        print("{} Score: {}".format(filename[:-4], file_score))
+        total += file_score
+    print("Total:", total)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        print("Score: ", score(sys.argv[1], sys.argv[2]))
+    else:
+        main()
@@ -9,7 +9,7 @@ try:
 except:
     pass
 
-from utils import save_object
+from utils import parallel_fmin, load_trials, store_trials
 
 # TODO Put classes here that may be useful to store info in
 
@@ -66,7 +66,11 @@ def sean_solution(input_info, **kwargs):
 
     # Ignore this bit if not searching hyper_parameters!
     if kwargs.get("search", True):
-        trials = Trials()
+        # Warm-start from earlier runs on this input, kept next to the outputs
+        store_location = os.path.join(
+            os.path.dirname(kwargs["output_dir"]), "trials.db"
+        )
+        trials = load_trials(store_location, kwargs["input_name"], "sean_solution")
 
         # TODO Setup what values the args searching over can have
         space = hp.choice(
@@ -74,30 +78,36 @@ def sean_solution(input_info, **kwargs):
             [{"arg1": hp.lognormal("arg1", 1, 0.5), "arg2": hp.uniform("arg2", 1, 10)}],
         )
 
-        # TODO If you know the best you do, pass loss_threshold=-best
         # Do hyper-param searching - possible pass per filename num_evals
-        best = fmin(
+        # With a time_limit, by default search for as long as it allows
+        time_limit = kwargs.get("time_limit", None)
+        num_evals = kwargs.get("num_evals", 10 if time_limit is None else np.inf)
+        best = parallel_fmin(
             objective,
             space=space,
-            algo=tpe.suggest,
-            max_evals=kwargs.get("num_evals", 10),
+            max_evals=len(trials) + num_evals,
             trials=trials,
+            num_workers=kwargs.get("num_workers", None),
+            time_limit=time_limit,
+            patience=kwargs.get("patience", None),
         )
 
         # Get the best hyper-params from fmin
         print("Best hyper-parameters found were:", best)
         args = space_eval(space, best)
 
-        # Save the trials to disk
+        # Add the trials to the store
         # These trials can be printed using print_trial_info in utils
-        out_name = os.path.join(
-            kwargs["output_dir"], "_" + kwargs["input_name"][:-2] + "pkl"
-        )
-        save_object(trials, out_name)
+        store_trials(store_location, kwargs["input_name"], "sean_solution", trials)
+
+        # Results loaded from the store have no solution, so only rerun then
+        result = trials.best_trial["result"]
+        if "solution" not in result:
+            result = objective(args)
 
     else:
         # By default, this is just an empty dictionary.
         args = kwargs.get("objective_args")
+        result = objective(args)
 
-    result = objective(args)
     return result["solution"], result["score"]
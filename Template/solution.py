@@ -15,6 +15,7 @@ import os
 from datetime import datetime
 from time import time
 from copy import copy
+from concurrent.futures import ProcessPoolExecutor
 import traceback
 
 import numpy as np
@@ -132,7 +133,29 @@ def run(input_location, output_location, method, **kwargs):
     return score
 
 
-def main(method, filenames, parameter_list, skip, seed):
+def run_seeded(job):
+    """
+    Seed the random number generator, then run.
+
+    This is the unit of work handed to each worker process by main.
+
+    Parameters
+    ----------
+    job : tuple
+        (seed, input_location, output_location, method, kwargs)
+
+    Returns
+    -------
+    float : score
+        The score returned by run.
+
+    """
+    seed, input_location, output_location, method, kwargs = job
+    np.random.seed(seed)
+    return run(input_location, output_location, method, **kwargs)
+
+
+def main(method, filenames, parameter_list, skip, seed, num_workers=1):
     """
     Parse the input information and run the main loop.
 
@@ -140,9 +163,10 @@ def main(method, filenames, parameter_list, skip, seed):
     1.  Create a new directory in the directory "outputs" with current time.
     2.  Zip the source code into that directory.
     3.  Loop over the filenames, running the function run on each one that
-        is not skipped. Also writes the score achieved into Result.txt
-        in the directory created in step 1.
-    4.  Adds up all the scores and prints the total score for this run.
+        is not skipped, in num_workers processes at once.
+    4.  Writes the score achieved for each file into Result.txt
+        in the directory created in step 1, in the order of filenames.
+    5.  Adds up all the scores and prints the total score for this run.
 
     Parameters
     ----------
@@ -156,7 +180,14 @@ def main(method, filenames, parameter_list, skip, seed):
     skip : list of bool
         skip[i] == True indicates you should skip execution of filename[i]
     seed : int
-        Seed for the random number generator
+        Seed for the random number generator.
+        Each file gets its own seed derived from this,
+        so results are the same however many workers are used.
+    num_workers : int, optional
+        How many files to run at the same time, by default 1.
+        Each file is run in its own process when this is more than 1,
+        and the cpus are split between them, as the num_workers parameter
+        for each file, unless its parameters already have one.
 
     Returns
     -------
@@ -180,6 +211,7 @@ def main(method, filenames, parameter_list, skip, seed):
     # Do setup of arrays etc.
     here = os.path.dirname(os.path.realpath(__file__))
     np.random.seed(seed)  # to reproduce results
+    file_seeds = np.random.SeedSequence(seed).generate_state(len(filenames))
     in_dir = "input_files"
     locations = [os.path.join(here, in_dir, filename) for filename in filenames]
     scores = np.zeros(len(locations))
@@ -195,36 +227,54 @@ def main(method, filenames, parameter_list, skip, seed):
     zip_loc = os.path.join(out_dir, "Source.zip")
     zip_dir(here, zip_loc, ".py")
 
-    # Start the execution loop
-    with open(os.path.join(out_dir, "Result.txt"), "w") as f:
-        for i, (input_location, params) in enumerate(zip(locations, parameter_list)):
-
-            # Ignore some files optionally
-            if skip[i]:
-                print("Skipping {}".format(input_location))
-                continue
-
-            # Setup and print what is happening
-            print(
-                "Working on {} with parameters {} using {}:".format(
-                    os.path.basename(input_location), params, method.__name__
-                )
-            )
-            output_location = os.path.join(
-                out_dir, os.path.basename(input_location[:-3]) + ".out"
-            )
+    # Setup what is to be run
+    jobs, job_idxs = [], []
+    for i, (input_location, params) in enumerate(zip(locations, parameter_list)):
 
-            # TODO Put anything which may be useful to all solutions here
-            params_copy = copy(params)
-            params_copy["output_dir"] = out_dir
-            params_copy["input_name"] = os.path.basename(input_location)
+        # Ignore some files optionally
+        if skip[i]:
+            print("Skipping {}".format(input_location))
+            continue
+
+        # Setup and print what is happening
+        print(
+            "Working on {} with parameters {} using {}:".format(
+                os.path.basename(input_location), params, method.__name__
+            )
+        )
+        output_location = os.path.join(
+            out_dir, os.path.basename(input_location[:-3]) + ".out"
+        )
 
-            # Actual running happens here
-            score = run(input_location, output_location, method, **params_copy)
+        # TODO Put anything which may be useful to all solutions here
+        params_copy = copy(params)
+        params_copy["output_dir"] = out_dir
+        params_copy["input_name"] = os.path.basename(input_location)
 
-            # Write the achieved score to disk
+        jobs.append(
+            (int(file_seeds[i]), input_location, output_location, method, params_copy)
+        )
+        job_idxs.append(i)
+
+    # Actual running happens here
+    # Files are independent, so they can be run in separate processes
+    if num_workers > 1 and len(jobs) > 1:
+        num_processes = min(num_workers, len(jobs))
+        # Share the cpus out, so the searches in each file's process
+        # don't each start a worker for every cpu
+        search_workers = max(1, (os.cpu_count() or 1) // num_processes)
+        for job in jobs:
+            job[-1].setdefault("num_workers", search_workers)
+        with ProcessPoolExecutor(max_workers=num_processes) as pool:
+            job_scores = list(pool.map(run_seeded, jobs))
+    else:
+        job_scores = [run_seeded(job) for job in jobs]
+
+    # Write the achieved scores to disk, in the order of the filenames
+    with open(os.path.join(out_dir, "Result.txt"), "w") as f:
+        for i, score in zip(job_idxs, job_scores):
             scores[i] = score
-            f.write("{} {}\n".format(os.path.basename(input_location)[:-3], score))
+            f.write("{} {}\n".format(os.path.basename(locations[i])[:-3], score))
 
         # Prints the final score
         last_str = "Total score: {}".format(np.sum(scores))
@@ -261,6 +311,12 @@ def setup_params(filenames):
         hyper_params = return_hyperparam_list()
         param_list = add_params(param_list, "objective_args", hyper_params)
 
+    # TODO Set a time limit in seconds for searching on each file
+    # The search also stops after patience trials without improvement.
+    # None means no limit, in which case num_evals trials are run.
+    param_list = add_params(param_list, "time_limit", None)
+    param_list = add_params(param_list, "patience", None)
+
     return param_list
 
 
@@ -278,7 +334,17 @@ if __name__ == "__main__":
     # TODO Set the random seed for reproducibility
     main_seed = 1
 
+    # TODO Set how many files to run at the same time, 1 runs them in turn
+    main_num_workers = len(main_filenames)
+
     # TODO inside of setup_params you can change parameters for specific files.
     main_param_list = setup_params(main_filenames)
 
-    main(main_method, main_filenames, main_param_list, main_skip, main_seed)
+    main(
+        main_method,
+        main_filenames,
+        main_param_list,
+        main_skip,
+        main_seed,
+        main_num_workers,
+    )